@@ -1,14 +1,13 @@
 from rest_framework import serializers
+from core.serializers_base import CachedFieldsMixin
 from core.models import Cart, CartItem
-from product.serializers import ProductSerializer, ColorSerializer
+from product.serializers import ProductMiniSerializer, ColorSerializer
 
 
-class CartItemSerializer(serializers.ModelSerializer):
-    product = ProductSerializer(read_only=True)
+class CartItemSerializer(CachedFieldsMixin, serializers.ModelSerializer):
+    product = ProductMiniSerializer(read_only=True)
     color = ColorSerializer(read_only=True)
-    total_price = serializers.DecimalField(
-        max_digits=10, decimal_places=2, read_only=True
-    )
+    total_price = serializers.SerializerMethodField()
 
     class Meta:
         model = CartItem
@@ -22,14 +21,53 @@ class CartItemSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ["total_price"]
 
+    def get_total_price(self, obj) -> str:
+        return format(obj.total_price, ".2f")
+
 
-class CartSerializer(serializers.ModelSerializer):
+class CartSerializer(CachedFieldsMixin, serializers.ModelSerializer):
     items = CartItemSerializer(many=True, read_only=True)
-    total_price = serializers.DecimalField(
-        max_digits=10, decimal_places=2, read_only=True
-    )
+    total_price = serializers.SerializerMethodField()
 
     class Meta:
         model = Cart
         fields = ["id", "items", "total_price", "created_at", "updated_at"]
         read_only_fields = ["total_price"]
+
+    def get_total_price(self, obj) -> str:
+        return format(obj.total_price, ".2f")
+
+
+QUANTITY_ERROR = "Quantity must be a positive integer"
+
+
+class QuantityField(serializers.IntegerField):
+    """A positive whole quantity, fractions and booleans are rejected"""
+
+    default_error_messages = {
+        "invalid": QUANTITY_ERROR,
+        "null": QUANTITY_ERROR,
+        "min_value": QUANTITY_ERROR,
+    }
+
+    def __init__(self, **kwargs):
+        kwargs.setdefault("min_value", 1)
+        super().__init__(**kwargs)
+
+
+class AddItemSerializer(serializers.Serializer):
+    """Validates the payload of the add_item action"""
+
+    product_id = serializers.IntegerField(
+        error_messages={
+            "required": "Product ID is required",
+            "null": "Product ID is required",
+            "invalid": "Invalid product ID",
+        }
+    )
+    quantity = QuantityField(default=1)
+    color_id = serializers.IntegerField(
+        required=False,
+        allow_null=True,
+        error_messages={"invalid": "Invalid color ID"},
+    )
@@ -1,3 +1,319 @@
+"""
+Tests for the cart API.
+"""
+
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import IntegrityError
 from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from core.models import Cart, CartItem, Category, Color, Product
+
+
+class CartApiTests(TestCase):
+    """Test the cart endpoints."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user(
+            username="buyer", password="pass12345"
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.cart = Cart.objects.create(user=self.user)
+
+        self.category = Category.objects.create(name="Mugs")
+        red = Color.objects.create(name="Red", code="#ff0000")
+        for i in range(5):
+            product = Product.objects.create(
+                name=f"Mug {i}",
+                description="A mug",
+                price=Decimal("10.00"),
+                image="products/mug.png",
+                category=self.category,
+            )
+            product.colors.add(red)
+            CartItem.objects.create(
+                cart=self.cart, product=product, quantity=2, color=red
+            )
+
+    def test_list_carts_query_count(self):
+        """Listing carts does not issue a query per cart item."""
+        with self.assertNumQueries(2):
+            res = self.client.get(reverse("cart-list"))
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(len(res.data[0]["items"]), 5)
+        self.assertEqual(res.data[0]["items"][0]["total_price"], "20.00")
+
+    def test_cart_total(self):
+        """The total action returns the summed price and quantity."""
+        url = reverse("cart-total", args=[self.cart.pk])
+        with self.assertNumQueries(1):
+            res = self.client.get(url)
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.data["total"], Decimal("100.00"))
+        self.assertEqual(res.data["items_count"], 10)
+
+    def test_cart_total_is_cached(self):
+        """Repeated total requests are served from the cache until the
+        cart changes."""
+        url = reverse("cart-total", args=[self.cart.pk])
+        self.client.get(url)
+
+        with self.assertNumQueries(0):
+            res = self.client.get(url)
+        self.assertEqual(res.data["items_count"], 10)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.cart.clear()
+        res = self.client.get(url)
+        self.assertEqual(res.data["items_count"], 0)
+
+    def test_cached_total_not_shared_with_other_users(self):
+        """A cached total is only served to the cart owner."""
+        url = reverse("cart-total", args=[self.cart.pk])
+        self.client.get(url)
+
+        other = get_user_model().objects.create_user(
+            username="other", password="pass12345"
+        )
+        self.client.force_authenticate(other)
+        res = self.client.get(url)
+
+        self.assertEqual(res.status_code, 404)
+
+    def test_total_malformed_pk(self):
+        """A non-numeric cart id is a 404, not a server error."""
+        with self.assertNumQueries(0):
+            res = self.client.get(reverse("cart-total", args=["abc"]))
+
+        self.assertEqual(res.status_code, 404)
+
+    def test_totals_follow_cart_changes(self):
+        """Stored cart totals are refreshed when items or prices change."""
+        item = self.cart.items.first()
+        self.cart.remove_item(item.pk)
+        self.cart.refresh_from_db()
+        self.assertEqual(self.cart.total_amount, Decimal("80.00"))
+        self.assertEqual(self.cart.items_count, 8)
+
+        product = self.cart.items.first().product
+        product.price = Decimal("20.00")
+        product.save()
+        self.cart.refresh_from_db()
+        self.assertEqual(self.cart.total_amount, Decimal("100.00"))
+
+        self.cart.clear()
+        self.cart.refresh_from_db()
+        self.assertEqual(self.cart.total_amount, Decimal("0.00"))
+        self.assertEqual(self.cart.items_count, 0)
+
+    def test_add_item_merges_existing_line(self):
+        """Adding a product already in the cart bumps its quantity."""
+        item = self.cart.items.first()
+        url = reverse("cart-add-item", args=[self.cart.pk])
+        res = self.client.post(
+            url,
+            {
+                "product_id": item.product_id,
+                "quantity": 3,
+                "color_id": item.color_id,
+            },
+            format="json",
+        )
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.data["quantity"], 5)
+        self.assertEqual(self.cart.items.count(), 5)
+
+    def test_add_item_creates_line(self):
+        """Adding a new product creates a cart line."""
+        product = Product.objects.create(
+            name="Plate",
+            description="A plate",
+            price=Decimal("4.50"),
+            image="products/plate.png",
+            category=self.category,
+        )
+        url = reverse("cart-add-item", args=[self.cart.pk])
+        res = self.client.post(url, {"product_id": product.pk}, format="json")
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.data["quantity"], 1)
+        self.assertEqual(self.cart.items.count(), 6)
+
+    def test_add_item_keeps_colors_apart(self):
+        """The same product in another color, or none, gets its own line."""
+        item = self.cart.items.first()
+        blue = Color.objects.create(name="Blue", code="#0000ff")
+        url = reverse("cart-add-item", args=[self.cart.pk])
+
+        res = self.client.post(
+            url,
+            {"product_id": item.product_id, "color_id": blue.pk},
+            format="json",
+        )
+        self.assertEqual(res.status_code, 200)
+        for _ in range(2):
+            res = self.client.post(
+                url, {"product_id": item.product_id}, format="json"
+            )
+            self.assertEqual(res.status_code, 200)
+
+        self.assertEqual(res.data["quantity"], 2)
+        self.assertEqual(
+            self.cart.items.filter(product_id=item.product_id).count(), 3
+        )
+
+    def test_add_item_unknown_color(self):
+        """Adding a product in a color that does not exist returns 404."""
+        item = self.cart.items.first()
+        url = reverse("cart-add-item", args=[self.cart.pk])
+        res = self.client.post(
+            url,
+            {"product_id": item.product_id, "color_id": 9999},
+            format="json",
+        )
+
+        self.assertEqual(res.status_code, 404)
+
+    def test_clear_cart(self):
+        """Clearing the cart removes every item."""
+        url = reverse("cart-clear", args=[self.cart.pk])
+        res = self.client.post(url)
+
+        self.assertEqual(res.status_code, 204)
+        self.assertFalse(self.cart.items.exists())
+
+    def test_remove_item(self):
+        """Removing an item returns no content."""
+        item = self.cart.items.first()
+        url = reverse("cart-remove-item", args=[self.cart.pk])
+        res = self.client.post(url, {"item_id": item.pk}, format="json")
+
+        self.assertEqual(res.status_code, 204)
+        self.assertFalse(CartItem.objects.filter(pk=item.pk).exists())
+
+    def test_add_item_unknown_product(self):
+        """Adding a product that does not exist returns 404."""
+        url = reverse("cart-add-item", args=[self.cart.pk])
+        res = self.client.post(url, {"product_id": 9999}, format="json")
+
+        self.assertEqual(res.status_code, 404)
+
+    def test_add_item_invalid_quantity(self):
+        """A non-positive quantity is rejected before touching the cart."""
+        item = self.cart.items.first()
+        url = reverse("cart-add-item", args=[self.cart.pk])
+        res = self.client.post(
+            url, {"product_id": item.product_id, "quantity": 0}, format="json"
+        )
+
+        self.assertEqual(res.status_code, 400)
+
+    def test_add_item_rejects_malformed_input(self):
+        """Each field is validated on its own, whole quantities only."""
+        item = self.cart.items.first()
+        url = reverse("cart-add-item", args=[self.cart.pk])
+        cases = [
+            ({"product_id": "abc"}, "Invalid product ID"),
+            (
+                {"product_id": item.product_id, "color_id": "abc"},
+                "Invalid color ID",
+            ),
+            (
+                {"product_id": item.product_id, "quantity": 2.7},
+                "Quantity must be a positive integer",
+            ),
+            (
+                {"product_id": item.product_id, "quantity": True},
+                "Quantity must be a positive integer",
+            ),
+        ]
+
+        for data, error in cases:
+            res = self.client.post(url, data, format="json")
+            self.assertEqual(res.status_code, 400)
+            self.assertEqual(res.data, {"error": error})
+        item.refresh_from_db()
+        self.assertEqual(item.quantity, 2)
+
+    def test_totals_follow_product_deletes(self):
+        """Deleting products, one by one or in bulk, refreshes the carts
+        holding them."""
+        products = list(Product.objects.order_by("pk"))
+
+        products[0].delete()
+        self.cart.refresh_from_db()
+        self.assertEqual(self.cart.total_amount, Decimal("80.00"))
+        self.assertEqual(self.cart.items_count, 8)
+
+        Product.objects.filter(pk__in=[p.pk for p in products[1:3]]).delete()
+        self.cart.refresh_from_db()
+        self.assertEqual(self.cart.total_amount, Decimal("40.00"))
+
+        self.category.delete()
+        self.cart.refresh_from_db()
+        self.assertEqual(self.cart.total_amount, Decimal("0.00"))
+        self.assertEqual(self.cart.items_count, 0)
+
+    def test_totals_follow_queryset_price_update(self):
+        """A queryset price update syncs price_cents and the cart totals."""
+        Product.objects.filter(name="Mug 0").update(price=Decimal("12.50"))
+
+        product = Product.objects.get(name="Mug 0")
+        self.assertEqual(product.price_cents, 1250)
+        self.cart.refresh_from_db()
+        self.assertEqual(self.cart.total_amount, Decimal("105.00"))
+
+    def test_totals_follow_bulk_writes(self):
+        """Bulk-created products carry their cents and bulk price updates
+        refresh the carts holding them."""
+        self.cart.clear()
+        products = Product.objects.bulk_create(
+            Product(
+                name=f"Plate {i}",
+                description="A plate",
+                price=Decimal("7.25"),
+                image="products/plate.png",
+                category=self.category,
+            )
+            for i in range(2)
+        )
+        for product in products:
+            CartItem.objects.create(cart=self.cart, product=product)
+        self.cart.refresh_from_db()
+        self.assertEqual(self.cart.total_amount, Decimal("14.50"))
+
+        for product in products:
+            product.price = Decimal("3.10")
+        Product.objects.bulk_update(products, ["price"])
+        self.cart.refresh_from_db()
+        self.assertEqual(self.cart.total_amount, Decimal("6.20"))
+
+    def test_product_save_refreshes_carts_on_price_change(self):
+        """Saving a product only touches carts when its price changed."""
+        product = Product.objects.get(name="Mug 0")
+        product.name = "Big mug"
+        # The product update only
+        with self.assertNumQueries(1):
+            product.save()
+
+        product.price = Decimal("12.50")
+        product.save()
+        self.cart.refresh_from_db()
+        self.assertEqual(self.cart.total_amount, Decimal("105.00"))
+
+    def test_colorless_lines_unique(self):
+        """A product can only have one color-less line per cart."""
+        product = Product.objects.first()
+        CartItem.objects.create(cart=self.cart, product=product)
 
-# Create your tests here.
+        with self.assertRaises(IntegrityError):
+            CartItem.objects.create(cart=self.cart, product=product)
@@ -1,15 +1,81 @@
 from django.shortcuts import render
 from rest_framework import viewsets, permissions, status
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
-from core.models import Cart, CartItem
-from .serializers import CartSerializer, CartItemSerializer
+from django.core.cache import cache
+from core.cache import versioned
+from django.db.models import F, Prefetch
+from core.models import Cart, CartItem, Color, Product
+from .serializers import (
+    AddItemSerializer,
+    CartSerializer,
+    CartItemSerializer,
+    QuantityField,
+)
 from drf_spectacular.utils import (
     extend_schema,
     OpenApiParameter,
     OpenApiResponse,
 )
 
+CART_TOTAL_CACHE_TIMEOUT = 60
+
+# OpenAPI schema fragments shared by the cart actions
+PK_PARAM = OpenApiParameter(name="pk", type=int, description="Cart ID")
+AUTH_401 = OpenApiResponse(
+    description="Authentication credentials were not provided."
+)
+INVALID_INPUT_400 = OpenApiResponse(description="Invalid input data")
+CART_NOT_FOUND_404 = OpenApiResponse(description="Cart not found")
+ITEM_NOT_FOUND_404 = OpenApiResponse(description="Cart or item not found")
+
+REMOVE_ITEM_REQUEST = {
+    "application/json": {
+        "type": "object",
+        "properties": {
+            "item_id": {"type": "integer"},
+        },
+        "required": ["item_id"],
+    }
+}
+UPDATE_QUANTITY_REQUEST = {
+    "application/json": {
+        "type": "object",
+        "properties": {
+            "item_id": {"type": "integer"},
+            "quantity": {"type": "integer", "minimum": 1},
+        },
+        "required": ["item_id", "quantity"],
+    }
+}
+TOTAL_RESPONSE = {
+    "type": "object",
+    "properties": {
+        "total": {"type": "number"},
+        "items_count": {"type": "integer"},
+    },
+}
+
+
+def _json_error(message, status_code=status.HTTP_400_BAD_REQUEST):
+    return Response({"error": message}, status=status_code)
+
+
+def _first_error(errors):
+    """The first message of a serializer's errors, for `_json_error`"""
+    messages = next(iter(errors.values()))
+    return str(messages[0])
+
+
+def _parse_quantity(value):
+    """Return `value` as a positive int or raise ValueError"""
+    try:
+        return QuantityField().run_validation(value)
+    except ValidationError as e:
+        raise ValueError(str(e.detail[0]))
+
+
 # Create your views here.
 
 
@@ -24,7 +90,26 @@ class CartViewSet(viewsets.ModelViewSet):
     permission_classes = [permissions.IsAuthenticated]
 
     def get_queryset(self):
-        return Cart.objects.filter(user=self.request.user)
+        return Cart.objects.filter(user=self.request.user).prefetch_related(
+            Prefetch(
+                "items",
+                queryset=CartItem.objects.select_related("product", "color")
+                # Only the columns CartItemSerializer renders
+                .only(
+                    "cart",
+                    "quantity",
+                    "created_at",
+                    "color__name",
+                    "color__code",
+                    "product__name",
+                    "product__price",
+                    "product__price_cents",
+                    "product__image",
+                ).annotate(
+                    line_total_cents=F("product__price_cents") * F("quantity")
+                ),
+            )
+        )
 
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
@@ -33,185 +118,157 @@ class CartViewSet(viewsets.ModelViewSet):
         tags=["cart"],
         summary="Add item to cart",
         description="Adds a product to the cart with specified quantity.",
-        parameters=[
-            OpenApiParameter(name="pk", type=int, description="Cart ID"),
-        ],
-        request={
-            "application/json": {
-                "type": "object",
-                "properties": {
-                    "product_id": {"type": "integer"},
-                    "quantity": {"type": "integer", "minimum": 1},
-                },
-                "required": ["product_id"],
-            }
-        },
+        parameters=[PK_PARAM],
+        request=AddItemSerializer,
         responses={
             200: CartItemSerializer,
-            400: OpenApiResponse(description="Invalid input data"),
-            401: OpenApiResponse(
-                description="Authentication credentials were not provided."
-            ),
+            400: INVALID_INPUT_400,
+            401: AUTH_401,
             404: OpenApiResponse(description="Cart or product not found"),
         },
     )
     @action(detail=True, methods=["post"])
     def add_item(self, request, pk=None):
-        cart = self.get_object()
-        product_id = request.data.get("product_id")
-        quantity = request.data.get("quantity", 1)
-
-        if not product_id:
-            return Response(
-                {"error": "Product ID is required"},
-                status=status.HTTP_400_BAD_REQUEST,
-            )
+        payload = AddItemSerializer(data=request.data)
+        if not payload.is_valid():
+            return _json_error(_first_error(payload.errors))
+        data = payload.validated_data
 
+        cart = self.get_object()
         try:
-            cart_item = cart.add_item(product_id, quantity)
-            serializer = CartItemSerializer(cart_item)
-            return Response(serializer.data)
-        except Exception as e:
-            return Response(
-                {"error": str(e)}, status=status.HTTP_400_BAD_REQUEST
+            cart_item = cart.add_item(
+                data["product_id"], data["quantity"], data.get("color_id")
             )
+        except Product.DoesNotExist:
+            return _json_error("Product not found", status.HTTP_404_NOT_FOUND)
+        except Color.DoesNotExist:
+            return _json_error("Color not found", status.HTTP_404_NOT_FOUND)
+
+        serializer = CartItemSerializer(
+            cart_item, context={"request": request}
+        )
+        return Response(serializer.data)
 
     @extend_schema(
         tags=["cart"],
         summary="Remove item from cart",
         description="Removes a specific item from the cart.",
-        parameters=[
-            OpenApiParameter(name="pk", type=int, description="Cart ID"),
-        ],
-        request={
-            "application/json": {
-                "type": "object",
-                "properties": {
-                    "item_id": {"type": "integer"},
-                },
-                "required": ["item_id"],
-            }
-        },
+        parameters=[PK_PARAM],
+        request=REMOVE_ITEM_REQUEST,
         responses={
-            200: OpenApiResponse(description="Item removed successfully"),
-            400: OpenApiResponse(description="Invalid input data"),
-            401: OpenApiResponse(
-                description="Authentication credentials were not provided."
-            ),
-            404: OpenApiResponse(description="Cart or item not found"),
+            204: OpenApiResponse(description="Item removed successfully"),
+            400: INVALID_INPUT_400,
+            401: AUTH_401,
+            404: ITEM_NOT_FOUND_404,
         },
     )
     @action(detail=True, methods=["post"])
     def remove_item(self, request, pk=None):
-        cart = self.get_object()
         item_id = request.data.get("item_id")
-
         if not item_id:
-            return Response(
-                {"error": "Item ID is required"},
-                status=status.HTTP_400_BAD_REQUEST,
-            )
+            return _json_error("Item ID is required")
 
+        cart = self.get_object()
         try:
             cart.remove_item(item_id)
-            return Response({"message": "Item removed successfully"})
-        except Exception as e:
-            return Response(
-                {"error": str(e)}, status=status.HTTP_400_BAD_REQUEST
-            )
+        except CartItem.DoesNotExist:
+            return _json_error("Item not found", status.HTTP_404_NOT_FOUND)
+        except ValueError:
+            return _json_error("Invalid item ID")
+
+        return Response(status=status.HTTP_204_NO_CONTENT)
 
     @extend_schema(
         tags=["cart"],
         summary="Update item quantity",
         description="Updates the quantity of a specific item in the cart.",
-        parameters=[
-            OpenApiParameter(name="pk", type=int, description="Cart ID"),
-        ],
-        request={
-            "application/json": {
-                "type": "object",
-                "properties": {
-                    "item_id": {"type": "integer"},
-                    "quantity": {"type": "integer", "minimum": 1},
-                },
-                "required": ["item_id", "quantity"],
-            }
-        },
+        parameters=[PK_PARAM],
+        request=UPDATE_QUANTITY_REQUEST,
         responses={
             200: CartItemSerializer,
-            400: OpenApiResponse(description="Invalid input data"),
-            401: OpenApiResponse(
-                description="Authentication credentials were not provided."
-            ),
-            404: OpenApiResponse(description="Cart or item not found"),
+            400: INVALID_INPUT_400,
+            401: AUTH_401,
+            404: ITEM_NOT_FOUND_404,
         },
     )
     @action(detail=True, methods=["post"])
     def update_quantity(self, request, pk=None):
-        cart = self.get_object()
         item_id = request.data.get("item_id")
         quantity = request.data.get("quantity")
-
         if not item_id or not quantity:
-            return Response(
-                {"error": "Item ID and quantity are required"},
-                status=status.HTTP_400_BAD_REQUEST,
-            )
+            return _json_error("Item ID and quantity are required")
+        try:
+            quantity = _parse_quantity(quantity)
+        except ValueError as e:
+            return _json_error(str(e))
 
+        cart = self.get_object()
         try:
             cart_item = cart.update_item_quantity(item_id, quantity)
-            serializer = CartItemSerializer(cart_item)
-            return Response(serializer.data)
-        except Exception as e:
-            return Response(
-                {"error": str(e)}, status=status.HTTP_400_BAD_REQUEST
-            )
+        except CartItem.DoesNotExist:
+            return _json_error("Item not found", status.HTTP_404_NOT_FOUND)
+        except ValueError:
+            return _json_error("Invalid item ID")
+
+        serializer = CartItemSerializer(
+            cart_item, context={"request": request}
+        )
+        return Response(serializer.data)
 
     @extend_schema(
         tags=["cart"],
         summary="Clear cart",
         description="Removes all items from the cart.",
-        parameters=[
-            OpenApiParameter(name="pk", type=int, description="Cart ID"),
-        ],
+        parameters=[PK_PARAM],
         responses={
-            200: OpenApiResponse(description="Cart cleared successfully"),
-            401: OpenApiResponse(
-                description="Authentication credentials were not provided."
-            ),
-            404: OpenApiResponse(description="Cart not found"),
+            204: OpenApiResponse(description="Cart cleared successfully"),
+            401: AUTH_401,
+            404: CART_NOT_FOUND_404,
         },
     )
     @action(detail=True, methods=["post"])
     def clear(self, request, pk=None):
         cart = self.get_object()
         cart.clear()
-        return Response({"message": "Cart cleared successfully"})
+        return Response(status=status.HTTP_204_NO_CONTENT)
 
     @extend_schema(
         tags=["cart"],
         summary="Get cart total",
         description="Calculates and returns the total price and number of items in the cart.",
-        parameters=[
-            OpenApiParameter(name="pk", type=int, description="Cart ID"),
-        ],
+        parameters=[PK_PARAM],
         responses={
-            200: {
-                "type": "object",
-                "properties": {
-                    "total": {"type": "number"},
-                    "items_count": {"type": "integer"},
-                },
-            },
-            401: OpenApiResponse(
-                description="Authentication credentials were not provided."
-            ),
-            404: OpenApiResponse(description="Cart not found"),
+            200: TOTAL_RESPONSE,
+            401: AUTH_401,
+            404: CART_NOT_FOUND_404,
         },
     )
     @action(detail=True, methods=["get"])
     def total(self, request, pk=None):
-        cart = self.get_object()
-        return Response(
-            {"total": cart.get_total(), "items_count": cart.get_items_count()}
+        try:
+            pk = int(pk)
+        except (TypeError, ValueError):
+            return _json_error("Cart not found", status.HTTP_404_NOT_FOUND)
+        key = versioned(Cart.total_cache_key(pk))
+        cached = cache.get(key)
+        if cached is not None and cached["user_id"] == request.user.pk:
+            return Response(cached["totals"])
+
+        # Totals are stored on the cart row, read just those two columns
+        row = (
+            Cart.objects.filter(pk=pk, user=request.user)
+            .values("total_amount", "items_count")
+            .first()
+        )
+        if row is None:
+            return _json_error("Cart not found", status.HTTP_404_NOT_FOUND)
+        totals = {
+            "total": row["total_amount"],
+            "items_count": row["items_count"],
+        }
+        cache.set(
+            key,
+            {"user_id": request.user.pk, "totals": totals},
+            CART_TOTAL_CACHE_TIMEOUT,
         )
+        return Response(totals)
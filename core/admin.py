@@ -5,6 +5,7 @@ from .models import (
     Color,
     Product,
     Comment,
+    Cart,
     Wallet,
     Order,
     OrderItem,
@@ -51,7 +52,7 @@ class ProductAdmin(admin.ModelAdmin):
     list_display = ("name", "price", "category", "created_at")
     list_filter = ("category", "colors", "discount")
     search_fields = ("name", "description")
-    filter_horizontal = ("colors",)
+    autocomplete_fields = ("colors", "category", "discount")
 
 
 @admin.register(Comment)
@@ -61,6 +62,14 @@ class CommentAdmin(admin.ModelAdmin):
     search_fields = ("user__username", "product__name", "text")
 
 
+@admin.register(Cart)
+class CartAdmin(admin.ModelAdmin):
+    list_display = ("user", "items_count", "total_amount", "updated_at")
+    list_select_related = ("user",)
+    search_fields = ("user__username",)
+    readonly_fields = ("items_count", "total_amount")
+
+
 @admin.register(Wallet)
 class WalletAdmin(admin.ModelAdmin):
     list_display = ("user", "balance", "created_at")
@@ -0,0 +1,49 @@
+"""
+Versioned cache keys for values invalidated when a transaction commits.
+"""
+
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+
+# Outlives every value cached under a version. Keys are built from request
+# input before any ownership check, so they must not pile up forever; an
+# expired version is simply replaced by a newer one
+VERSION_TIMEOUT = 60 * 60
+
+
+def _version_key(key):
+    return f"{key}:version"
+
+
+def versioned(key):
+    """
+    Return the cache key the value for `key` currently lives under.
+
+    Call it before reading the value from the database. If a writer commits
+    in between, it moves `key` to a new version, so the stale value is
+    stored under a key nobody reads any more instead of being served until
+    it times out.
+    """
+    version_key = _version_key(key)
+    version = cache.get(version_key)
+    if version is None:
+        # Time-based, so a lost version key never brings back an old one
+        cache.add(version_key, time.time_ns(), VERSION_TIMEOUT)
+        version = cache.get(version_key)
+    return f"{key}:{version}"
+
+
+def invalidate_on_commit(*keys):
+    """Move `keys` to a new version once the current transaction commits"""
+
+    def bump():
+        for key in keys:
+            try:
+                cache.incr(_version_key(key))
+            except ValueError:
+                # No version yet, the next reader starts a fresh one
+                pass
+
+    transaction.on_commit(bump)
@@ -0,0 +1,35 @@
+"""
+Project-wide DRF exception handling.
+"""
+
+import logging
+
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.views import exception_handler as drf_exception_handler
+from rest_framework.views import set_rollback
+
+logger = logging.getLogger(__name__)
+
+
+def exception_handler(exc, context):
+    """
+    Render API exceptions the DRF way. Anything else is a bug: log it once
+    with its traceback and answer a generic 500 instead of echoing the
+    exception message to the client.
+    """
+    response = drf_exception_handler(exc, context)
+    if response is not None:
+        return response
+
+    view = context.get("view")
+    logger.error(
+        "Unhandled exception in %s",
+        view.__class__.__name__ if view else "API view",
+        exc_info=exc,
+    )
+    set_rollback()
+    return Response(
+        {"error": "Internal server error"},
+        status=status.HTTP_500_INTERNAL_SERVER_ERROR,
+    )
@@ -9,24 +9,26 @@ from django.core.management.base import BaseCommand
 from django.db.utils import OperationalError
 from psycopg2 import OperationalError as Psycopg2OpError
 
+MAX_DELAY = 10
+
 
 class Command(BaseCommand):
     """Django command to wait for database."""
 
     def handle(self, *args, **options):
-        for alias in settings.DATABASES.keys():
-            self.stdout.write(f'⏳ Waiting for database "{alias}"...')
-            up = False
-            while not up:
-                try:
-                    # checks connectivity for this alias
-                    self.check(databases=[alias])
-                    up = True
-                except (Psycopg2OpError, OperationalError):
-                    self.stdout.write(
-                        f'🚧 "{alias}" unavailable, retrying in 1s...'
-                    )
-                    time.sleep(1)
-            self.stdout.write(
-                self.style.SUCCESS(f'✅ "{alias}" is available!')
-            )
+        aliases = list(settings.DATABASES.keys())
+        names = ", ".join(f'"{alias}"' for alias in aliases)
+        self.stdout.write(f"⏳ Waiting for databases {names}...")
+        delay = 1
+        while True:
+            try:
+                # checks connectivity for every alias at once
+                self.check(databases=aliases)
+                break
+            except (Psycopg2OpError, OperationalError):
+                self.stdout.write(
+                    f"🚧 Databases unavailable, retrying in {delay}s..."
+                )
+                time.sleep(delay)
+                delay = min(delay * 2, MAX_DELAY)
+        self.stdout.write(self.style.SUCCESS(f"✅ {names} available!"))
@@ -0,0 +1,45 @@
+# Generated by Django 5.2.18 on 2026-10-15 02:23
+
+from django.db import migrations, models
+from django.db.models import Count, Min, Sum
+
+
+def merge_duplicate_cart_items(apps, schema_editor):
+    """Fold duplicate (cart, product, color) lines into the oldest one."""
+    CartItem = apps.get_model('core', 'CartItem')
+    duplicates = (
+        CartItem.objects.values('cart', 'product', 'color')
+        .annotate(keep=Min('id'), total=Sum('quantity'), lines=Count('id'))
+        .filter(lines__gt=1)
+    )
+    for group in duplicates:
+        lines = CartItem.objects.filter(
+            cart=group['cart'], product=group['product'], color=group['color']
+        )
+        lines.filter(id=group['keep']).update(quantity=group['total'])
+        lines.exclude(id=group['keep']).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_discount_product_discount'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            merge_duplicate_cart_items, migrations.RunPython.noop
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['product', '-created_at'], name='core_commen_product_074957_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['user', 'status'], name='core_order_user_id_4407f8_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='cartitem',
+            constraint=models.UniqueConstraint(fields=('cart', 'product', 'color'), name='uniq_cartitem'),
+        ),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 5.2.18 on 2026-10-15 02:24
+
+from decimal import Decimal
+
+from django.db import migrations, models
+from django.db.models import F, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+
+def backfill_cart_totals(apps, schema_editor):
+    Cart = apps.get_model('core', 'Cart')
+    CartItem = apps.get_model('core', 'CartItem')
+    lines = (
+        CartItem.objects.filter(cart=OuterRef('pk'))
+        .values('cart')
+        .annotate(
+            total=Sum(
+                F('product__price') * F('quantity'),
+                output_field=models.DecimalField(max_digits=12, decimal_places=2),
+            ),
+            count=Sum('quantity'),
+        )
+    )
+    Cart.objects.update(
+        total_amount=Coalesce(
+            Subquery(lines.values('total')),
+            Value(Decimal('0.00')),
+            output_field=models.DecimalField(max_digits=12, decimal_places=2),
+        ),
+        items_count=Coalesce(Subquery(lines.values('count')), 0),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_cartitem_unique_and_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cart',
+            name='items_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='cart',
+            name='total_amount',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=12),
+        ),
+        migrations.RunPython(backfill_cart_totals, migrations.RunPython.noop),
+    ]
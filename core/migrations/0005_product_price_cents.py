@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-15 02:30
+
+from django.db import migrations, models
+from django.db.models import F
+from django.db.models.functions import Cast, Round
+
+
+def backfill_price_cents(apps, schema_editor):
+    Product = apps.get_model('core', 'Product')
+    Product.objects.update(
+        price_cents=Cast(Round(F('price') * 100), models.BigIntegerField())
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_cart_totals'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='price_cents',
+            field=models.BigIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_price_cents, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.18 on 2026-10-15 02:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_product_price_cents'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['user', '-created_at'], name='core_order_user_id_fdcf24_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['wallet', '-created_at'], name='core_transa_wallet__ea083c_idx'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-15 02:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_order_transaction_created_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='discount',
+            index=models.Index(fields=['start_date', 'end_date'], name='core_discou_start_d_b56bc4_idx'),
+        ),
+    ]
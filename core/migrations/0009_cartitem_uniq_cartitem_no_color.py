@@ -0,0 +1,38 @@
+# Generated by Django 5.2.18 on 2026-10-15 03:11
+
+from django.db import migrations, models
+from django.db.models import Count, Min, Sum
+
+
+def merge_duplicate_colorless_items(apps, schema_editor):
+    """Fold duplicate color-less (cart, product) lines into the oldest one."""
+    CartItem = apps.get_model('core', 'CartItem')
+    duplicates = (
+        CartItem.objects.filter(color__isnull=True)
+        .values('cart', 'product')
+        .annotate(keep=Min('id'), total=Sum('quantity'), lines=Count('id'))
+        .filter(lines__gt=1)
+    )
+    for group in duplicates:
+        lines = CartItem.objects.filter(
+            cart=group['cart'], product=group['product'], color__isnull=True
+        )
+        lines.filter(id=group['keep']).update(quantity=group['total'])
+        lines.exclude(id=group['keep']).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_transaction_wallet_related_name'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            merge_duplicate_colorless_items, migrations.RunPython.noop
+        ),
+        migrations.AddConstraint(
+            model_name='cartitem',
+            constraint=models.UniqueConstraint(condition=models.Q(('color__isnull', True)), fields=('cart', 'product'), name='uniq_cartitem_no_color'),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-15 03:22
+
+from django.db import migrations, models
+from django.db.models import F
+from django.db.models.functions import Cast, Round
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_cartitem_uniq_cartitem_no_color'),
+    ]
+
+    # Existing columns cannot be altered into generated ones
+    operations = [
+        migrations.RemoveField(
+            model_name='product',
+            name='price_cents',
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='price_cents',
+            field=models.GeneratedField(db_persist=True, expression=Cast(Round(F('price') * 100), models.BigIntegerField()), output_field=models.BigIntegerField()),
+        ),
+    ]
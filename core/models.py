@@ -1,8 +1,25 @@
+from decimal import Decimal
+
 from django.contrib.auth.models import AbstractUser
-from django.db import models
+from django.db import connection, models, transaction
+from django.db.models import (
+    ExpressionWrapper,
+    F,
+    OuterRef,
+    Q,
+    Subquery,
+    Sum,
+    Value,
+)
+from django.db.models.functions import Cast, Coalesce, Round
+from django.db.models.signals import post_delete, pre_delete
+from django.dispatch import receiver
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 from django.conf import settings
 
+from core.cache import invalidate_on_commit
+
 
 # User Model
 class CustomUser(AbstractUser):
@@ -22,18 +39,38 @@ class CustomUser(AbstractUser):
     def __str__(self):
         return self.username
 
+    @staticmethod
+    def profile_cache_key(user_id):
+        return f"user:{user_id}:profile"
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        invalidate_on_commit(self.profile_cache_key(self.pk))
+
 
 # Product Models
 class Category(models.Model):
     name = models.CharField(max_length=100)
     description = models.TextField(blank=True)
 
+    # The API caches the full category list under this key
+    list_cache_key = "categories:list"
+
     class Meta:
         verbose_name_plural = "Categories"
 
     def __str__(self):
         return self.name
 
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        _invalidate_cached_list(self.list_cache_key)
+
+    def delete(self, *args, **kwargs):
+        result = super().delete(*args, **kwargs)
+        _invalidate_cached_list(self.list_cache_key)
+        return result
+
 
 class Discount(models.Model):
     name = models.CharField(max_length=100)
@@ -47,28 +84,82 @@ class Discount(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [models.Index(fields=["start_date", "end_date"])]
+
     def __str__(self):
         return f"{self.name} ({self.discount_percent}%)"
 
     def is_valid(self):
-        from django.utils import timezone
-
-        now = timezone.now()
-        return self.is_active and self.start_date <= now <= self.end_date
+        # Memoized: discounted_price and has_active_discount both ask for
+        # it whenever a product is serialized
+        cached = getattr(self, "_is_valid_cache", None)
+        if cached is None:
+            now = timezone.now()
+            cached = bool(
+                self.is_active and self.start_date <= now <= self.end_date
+            )
+            self._is_valid_cache = cached
+        return cached
 
 
 class Color(models.Model):
     name = models.CharField(max_length=50)
     code = models.CharField(max_length=7)  # Hex color code
 
+    # The API caches the full color list under this key
+    list_cache_key = "colors:list"
+
     def __str__(self):
         return self.name
 
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        _invalidate_cached_list(self.list_cache_key)
+
+    def delete(self, *args, **kwargs):
+        result = super().delete(*args, **kwargs)
+        _invalidate_cached_list(self.list_cache_key)
+        return result
+
+
+class ProductQuerySet(models.QuerySet):
+    def update(self, **kwargs):
+        """
+        Queryset updates bypass Product.save, so `updated_at` is stamped
+        here and a price change also refreshes the carts holding the
+        products.
+        """
+        kwargs.setdefault("updated_at", timezone.now())
+        if "price" not in kwargs:
+            return super().update(**kwargs)
+        with transaction.atomic():
+            # The filter may stop matching once the price changed
+            ids = list(self.values_list("pk", flat=True))
+            updated = super().update(**kwargs)
+            _refresh_carts_holding(ids)
+        return updated
+
+    def bulk_update(self, objs, fields, *args, **kwargs):
+        if "price" not in fields:
+            return super().bulk_update(objs, fields, *args, **kwargs)
+        with transaction.atomic():
+            updated = super().bulk_update(objs, fields, *args, **kwargs)
+            _refresh_carts_holding([obj.pk for obj in objs])
+        return updated
+
 
 class Product(models.Model):
     name = models.CharField(max_length=200)
     description = models.TextField()
     price = models.DecimalField(max_digits=10, decimal_places=2)
+    # Integer copy of `price` for arithmetic-heavy queries, computed by the
+    # database so no write path can leave it behind
+    price_cents = models.GeneratedField(
+        expression=Cast(Round(F("price") * 100), models.BigIntegerField()),
+        output_field=models.BigIntegerField(),
+        db_persist=True,
+    )
     image = models.ImageField(upload_to="products/")
     category = models.ForeignKey(
         Category, on_delete=models.CASCADE, related_name="products"
@@ -84,12 +175,37 @@ class Product(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = ProductQuerySet.as_manager()
+
     def __str__(self):
         return self.name
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Lets save() tell whether the price changed
+        instance._loaded_price = instance.__dict__.get("price")
+        return instance
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get("update_fields")
+        price_changed = (
+            not self._state.adding
+            and (update_fields is None or "price" in update_fields)
+            and self.price != getattr(self, "_loaded_price", None)
+        )
+        super().save(*args, **kwargs)
+        self._loaded_price = self.price
+        if price_changed:
+            # Carts store their totals, refresh the ones holding this product
+            _refresh_carts_holding([self.pk])
+
     @property
     def discounted_price(self):
         """Calculate the discounted price if there's an active discount"""
+        # product.querysets.with_discount_info computes it in the query
+        if hasattr(self, "price_after_discount"):
+            return self.price_after_discount
         if self.discount and self.discount.is_valid():
             discount_amount = (
                 self.price * self.discount.discount_percent
@@ -100,6 +216,8 @@ class Product(models.Model):
     @property
     def has_active_discount(self):
         """Check if the product has an active discount"""
+        if hasattr(self, "is_discount_active"):
+            return self.is_discount_active
         return self.discount and self.discount.is_valid()
 
 
@@ -116,6 +234,7 @@ class Comment(models.Model):
 
     class Meta:
         ordering = ["-created_at"]
+        indexes = [models.Index(fields=["product", "-created_at"])]
 
     def __str__(self):
         return f"Comment by {self.user.username} on {self.product.name}"
@@ -126,15 +245,83 @@ class Cart(models.Model):
     user = models.OneToOneField(
         settings.AUTH_USER_MODEL, on_delete=models.CASCADE
     )
+    # Denormalized from the cart items, kept in sync by _recompute_totals
+    total_amount = models.DecimalField(
+        max_digits=12, decimal_places=2, default=0
+    )
+    items_count = models.PositiveIntegerField(default=0)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return f"Cart for {self.user.username}"
 
+    @staticmethod
+    def total_cache_key(cart_id):
+        return f"cart:{cart_id}:total"
+
     @property
     def total_price(self):
-        return sum(item.total_price for item in self.items.all())
+        return self.total_amount
+
+    def get_totals(self):
+        return {"total": self.total_amount, "items_count": self.items_count}
+
+    def get_total(self):
+        return self.total_amount
+
+    def get_items_count(self):
+        return self.items_count
+
+    @transaction.atomic
+    def add_item(self, product_id, quantity=1, color_id=None):
+        """
+        Add a product in the given color to the cart, merging with the line
+        that already holds that product and color
+        """
+        if not Product.objects.filter(pk=product_id).exists():
+            raise Product.DoesNotExist("Product not found")
+        if (
+            color_id is not None
+            and not Color.objects.filter(pk=color_id).exists()
+        ):
+            raise Color.DoesNotExist("Color not found")
+        # Looked up on the full uniq_cartitem key
+        item, created = CartItem.objects.select_for_update().get_or_create(
+            cart=self,
+            product_id=product_id,
+            color_id=color_id,
+            defaults={"quantity": quantity},
+        )
+        if not created:
+            CartItem.objects.filter(pk=item.pk).update(
+                quantity=F("quantity") + quantity
+            )
+            item.refresh_from_db(fields=["quantity"])
+            _recompute_totals([self.pk])
+        return item
+
+    @transaction.atomic
+    def remove_item(self, item_id):
+        deleted, _ = self.items.filter(pk=item_id).delete()
+        if not deleted:
+            raise CartItem.DoesNotExist("Cart item not found")
+        _recompute_totals([self.pk])
+
+    def update_item_quantity(self, item_id, quantity):
+        item = self.items.get(pk=item_id)
+        item.quantity = quantity
+        item.save(update_fields=["quantity", "updated_at"])
+        return item
+
+    @transaction.atomic
+    def clear(self):
+        deleted = self.items.all().delete()
+        Cart.objects.filter(pk=self.pk).update(
+            total_amount=0, items_count=0, updated_at=timezone.now()
+        )
+        _invalidate_cached_totals([self.pk])
+        return deleted
 
 
 class CartItem(models.Model):
@@ -147,14 +334,109 @@ class CartItem(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["cart", "product", "color"], name="uniq_cartitem"
+            ),
+            # NULLs compare distinct, so color-less lines need their own
+            models.UniqueConstraint(
+                fields=["cart", "product"],
+                condition=Q(color__isnull=True),
+                name="uniq_cartitem_no_color",
+            ),
+        ]
+
     def __str__(self):
         return f"{self.quantity} x {self.product.name}"
 
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        _recompute_totals([self.cart_id])
+
+    def delete(self, *args, **kwargs):
+        result = super().delete(*args, **kwargs)
+        _recompute_totals([self.cart_id])
+        return result
+
     @property
     def total_price(self):
+        # Querysets may annotate `line_total_cents` to compute this in the DB
+        if hasattr(self, "line_total_cents"):
+            return Decimal(self.line_total_cents) / 100
         return self.product.price * self.quantity
 
 
+def _recompute_totals(cart_ids):
+    """
+    Refresh the denormalized totals of the given carts in a single UPDATE.
+    Queryset updates and deletes of cart items bypass CartItem.save/delete,
+    so callers doing those must call this themselves.
+    """
+    lines = (
+        CartItem.objects.filter(cart=OuterRef("pk"))
+        .values("cart")
+        .annotate(
+            total_cents=Sum(F("product__price_cents") * F("quantity")),
+            count=Sum("quantity"),
+        )
+    )
+    Cart.objects.filter(pk__in=cart_ids).update(
+        total_amount=ExpressionWrapper(
+            Coalesce(Subquery(lines.values("total_cents")), 0)
+            * Value(Decimal("0.01")),
+            output_field=models.DecimalField(max_digits=12, decimal_places=2),
+        ),
+        items_count=Coalesce(Subquery(lines.values("count")), 0),
+        updated_at=timezone.now(),
+    )
+    _invalidate_cached_totals(cart_ids)
+
+
+# Deleting a product cascades to its cart items without calling
+# CartItem.delete, whether it is deleted directly, through a queryset or
+# through its category, so the carts are refreshed from these receivers
+@receiver(pre_delete, sender=Product)
+def _collect_product_carts(sender, instance, **kwargs):
+    instance._cart_ids = _carts_holding([instance.pk])
+
+
+@receiver(post_delete, sender=Product)
+def _refresh_product_carts(sender, instance, **kwargs):
+    # The cascaded cart items are already gone when this runs
+    cart_ids = getattr(instance, "_cart_ids", None)
+    if cart_ids:
+        _recompute_totals(cart_ids)
+
+
+def _carts_holding(product_ids):
+    return list(
+        CartItem.objects.filter(product_id__in=product_ids)
+        .values_list("cart_id", flat=True)
+        .distinct()
+    )
+
+
+def _refresh_carts_holding(product_ids):
+    cart_ids = _carts_holding(product_ids)
+    if cart_ids:
+        _recompute_totals(cart_ids)
+
+
+def _invalidate_cached_list(key):
+    invalidate_on_commit(key)
+
+
+def _invalidate_cached_totals(cart_ids):
+    # Readers cache under the version they saw before querying, so one
+    # that read the old totals cannot put them back once this commits
+    invalidate_on_commit(*(Cart.total_cache_key(pk) for pk in cart_ids))
+
+
+def _invalidate_cached_balance(wallet_id):
+    invalidate_on_commit(Wallet.balance_cache_key(wallet_id))
+
+
 # Order Models
 class Wallet(models.Model):
     user = models.OneToOneField(
@@ -164,9 +446,63 @@ class Wallet(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class InsufficientFunds(ValueError):
+        """The balance does not cover a withdrawal"""
+
     def __str__(self):
         return f"Wallet for {self.user.username}"
 
+    @staticmethod
+    def balance_cache_key(wallet_id):
+        return f"wallet:{wallet_id}:balance"
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        _invalidate_cached_balance(self.pk)
+
+    def delete(self, *args, **kwargs):
+        wallet_id = self.pk
+        result = super().delete(*args, **kwargs)
+        _invalidate_cached_balance(wallet_id)
+        return result
+
+    def deposit(self, amount, transaction_type="deposit", order=None):
+        """Add `amount` to the balance and record the transaction"""
+        return self._change_balance(
+            Decimal(str(amount)), transaction_type, order
+        )
+
+    def withdraw(self, amount, transaction_type="withdrawal", order=None):
+        """
+        Take `amount` from the balance and record the transaction.
+        Raises Wallet.InsufficientFunds if the balance does not cover it.
+        """
+        return self._change_balance(
+            -Decimal(str(amount)), transaction_type, order
+        )
+
+    def _change_balance(self, delta, transaction_type, order):
+        wallets = Wallet.objects.filter(pk=self.pk)
+        if delta < 0:
+            # Folding the check into the UPDATE makes it atomic
+            wallets = wallets.filter(balance__gte=-delta)
+        with transaction.atomic():
+            updated = wallets.update(
+                balance=F("balance") + delta, updated_at=timezone.now()
+            )
+            if not updated:
+                raise Wallet.InsufficientFunds("Insufficient funds")
+            _invalidate_cached_balance(self.pk)
+            # Defer the changed fields, they reload only if read again
+            self.__dict__.pop("balance", None)
+            self.__dict__.pop("updated_at", None)
+            return Transaction.objects.create(
+                wallet=self,
+                amount=abs(delta),
+                transaction_type=transaction_type,
+                order=order,
+            )
+
 
 class Order(models.Model):
     STATUS_CHOICES = [
@@ -198,9 +534,55 @@ class Order(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["user", "status"]),
+            models.Index(fields=["user", "-created_at"]),
+        ]
+
     def __str__(self):
         return f"Order #{self.id} by {self.user.username}"
 
+    def copy_items_from_cart(self, cart):
+        """
+        Copy the cart lines into this order at the current product prices
+        and set `total_amount` from the copied lines. Returns the number of
+        lines copied.
+
+        The lines go through a single INSERT ... SELECT so no rows pass
+        through Python, and the total is summed from what was actually
+        inserted rather than taken from the cart's stored totals.
+        """
+        qn = connection.ops.quote_name
+        sql = (
+            f"INSERT INTO {qn(OrderItem._meta.db_table)} "
+            f"({qn('order_id')}, {qn('product_id')}, {qn('quantity')}, "
+            f"{qn('price')}, {qn('color_id')}) "
+            f"SELECT %s, ci.{qn('product_id')}, ci.{qn('quantity')}, "
+            f"p.{qn('price')}, ci.{qn('color_id')} "
+            f"FROM {qn(CartItem._meta.db_table)} ci "
+            f"INNER JOIN {qn(Product._meta.db_table)} p "
+            f"ON p.{qn('id')} = ci.{qn('product_id')} "
+            f"WHERE ci.{qn('cart_id')} = %s"
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [self.pk, cart.pk])
+            copied = cursor.rowcount
+
+        if copied:
+            self.total_amount = self.items.aggregate(
+                total=Sum(
+                    ExpressionWrapper(
+                        F("price") * F("quantity"),
+                        output_field=models.DecimalField(
+                            max_digits=10, decimal_places=2
+                        ),
+                    )
+                )
+            )["total"]
+            self.save(update_fields=["total_amount", "updated_at"])
+        return copied
+
 
 class OrderItem(models.Model):
     order = models.ForeignKey(
@@ -229,7 +611,9 @@ class Transaction(models.Model):
         ("refund", "Refund"),
     ]
 
-    wallet = models.ForeignKey(Wallet, on_delete=models.CASCADE)
+    wallet = models.ForeignKey(
+        Wallet, on_delete=models.CASCADE, related_name="transactions"
+    )
     amount = models.DecimalField(max_digits=10, decimal_places=2)
     transaction_type = models.CharField(
         max_length=20, choices=TRANSACTION_TYPES
@@ -239,6 +623,9 @@ class Transaction(models.Model):
     )
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [models.Index(fields=["wallet", "-created_at"])]
+
     def __str__(self):
         return f"{self.transaction_type} of {self.amount} for {self.wallet.user.username}"
 
@@ -0,0 +1,31 @@
+"""
+Shared pagination classes.
+"""
+
+from rest_framework.pagination import CursorPagination, LimitOffsetPagination
+
+
+class CreatedAtCursorPagination(CursorPagination):
+    """
+    Newest-first cursor pagination for long, append-only histories.
+
+    Each page is a keyset query on `created_at`, so its cost does not grow
+    with the page number the way OFFSET does.
+    """
+
+    ordering = "-created_at"
+    page_size = 100
+    max_page_size = 500
+    page_size_query_param = "page_size"
+
+
+class BoundedLimitOffsetPagination(LimitOffsetPagination):
+    """
+    Limit/offset pagination that is always on.
+
+    Requests without `?limit=` get `default_limit` rows instead of the whole
+    table, and no request can ask for more than `max_limit`.
+    """
+
+    default_limit = 50
+    max_limit = 200
@@ -0,0 +1,26 @@
+"""
+Shared serializer base classes.
+"""
+
+import copy
+
+
+class CachedFieldsMixin:
+    """
+    Cache the fields a ModelSerializer builds from its model.
+
+    ModelSerializer.get_fields() introspects the model on every
+    instantiation. The result only depends on the serializer class, so it
+    is built once per class and deep-copied for each instance, the same way
+    DRF copies declared fields.
+    """
+
+    _fields_cache = {}
+
+    def get_fields(self):
+        cls = self.__class__
+        cached = self._fields_cache.get(cls)
+        if cached is None:
+            cached = super().get_fields()
+            self._fields_cache[cls] = cached
+        return copy.deepcopy(cached)
@@ -0,0 +1,38 @@
+"""
+Test the versioned cache keys.
+"""
+
+from django.core.cache import cache
+from django.test import TestCase
+
+from core.cache import invalidate_on_commit, versioned
+
+
+class VersionedCacheTests(TestCase):
+    """Test versioned and invalidate_on_commit."""
+
+    def setUp(self):
+        cache.clear()
+
+    def test_key_stable_until_invalidated(self):
+        """The key only changes once the invalidating transaction commits."""
+        key = versioned("thing")
+        self.assertEqual(versioned("thing"), key)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            invalidate_on_commit("thing")
+            self.assertEqual(versioned("thing"), key)
+
+        self.assertNotEqual(versioned("thing"), key)
+
+    def test_racing_reader_does_not_restore_stale_value(self):
+        """A value read before a commit is cached where nobody looks."""
+        # Reader resolves its key and reads the old value ...
+        key = versioned("thing")
+        # ... a writer commits and invalidates ...
+        with self.captureOnCommitCallbacks(execute=True):
+            invalidate_on_commit("thing")
+        # ... then the reader caches what it read
+        cache.set(key, "stale")
+
+        self.assertIsNone(cache.get(versioned("thing")))
@@ -2,14 +2,20 @@
 Test custom Django management commands.
 """
 
-from unittest.mock import patch
+from unittest.mock import call, patch
 
 from django.core.management import call_command
 from django.db.utils import OperationalError
-from django.test import SimpleTestCase
+from django.test import SimpleTestCase, override_settings
 from psycopg2 import OperationalError as Psycopg2OpError
 
+DATABASES = {
+    "default": {"ENGINE": "django.db.backends.sqlite3"},
+    "mongodb": {"ENGINE": "django.db.backends.sqlite3"},
+}
 
+
+@override_settings(DATABASES=DATABASES)
 @patch("core.management.commands.wait_for_db.Command.check")
 class CommandTests(SimpleTestCase):
     """Test commands."""
@@ -20,28 +26,21 @@ class CommandTests(SimpleTestCase):
 
         call_command("wait_for_db")
 
-        # Check that both databases were checked
-        self.assertEqual(patched_check.call_count, 2)
-        patched_check.assert_any_call(databases=["default"])
-        patched_check.assert_any_call(databases=["mongodb"])
+        # Both databases are checked in a single call
+        patched_check.assert_called_once_with(databases=["default", "mongodb"])
 
     @patch("time.sleep")
     def test_wait_for_db_delay(self, patched_sleep, patched_check):
         """Test waiting for database when getting OperationalError."""
-        # Simulate errors for both databases
         patched_check.side_effect = (
-            [Psycopg2OpError] * 2
-            + [OperationalError] * 3
-            + [True]  # For default DB
-            + [Psycopg2OpError] * 2
-            + [OperationalError] * 3
-            + [True]  # For mongodb
+            [Psycopg2OpError] * 2 + [OperationalError] * 3 + [True]
         )
 
         call_command("wait_for_db")
 
-        # Check that both databases were checked multiple times
-        self.assertEqual(patched_check.call_count, 12)
-        # Verify the last calls were for both databases
-        patched_check.assert_any_call(databases=["default"])
-        patched_check.assert_any_call(databases=["mongodb"])
+        self.assertEqual(patched_check.call_count, 6)
+        patched_check.assert_called_with(databases=["default", "mongodb"])
+        # Delay doubles on each failure and is capped
+        patched_sleep.assert_has_calls(
+            [call(1), call(2), call(4), call(8), call(10)]
+        )
@@ -0,0 +1,29 @@
+"""
+Test the project exception handler.
+"""
+
+from django.test import SimpleTestCase
+from rest_framework.exceptions import ValidationError
+
+from core.exceptions import exception_handler
+
+
+class ExceptionHandlerTests(SimpleTestCase):
+    """Test exception_handler."""
+
+    def test_api_exception_rendered_by_drf(self):
+        """Expected API errors keep their status and payload."""
+        response = exception_handler(
+            ValidationError({"error": "Cart is empty"}), {}
+        )
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data, {"error": "Cart is empty"})
+
+    def test_unexpected_exception_logged(self):
+        """Unexpected errors are logged and hidden behind a 500."""
+        with self.assertLogs("core.exceptions", level="ERROR"):
+            response = exception_handler(RuntimeError("secret detail"), {})
+
+        self.assertEqual(response.status_code, 500)
+        self.assertNotIn("secret detail", str(response.data))
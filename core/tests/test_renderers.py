@@ -0,0 +1,45 @@
+"""
+Tests for the orjson renderer.
+"""
+
+import json
+from datetime import datetime, timezone
+from decimal import Decimal
+
+from django.test import SimpleTestCase
+from django.utils.translation import gettext_lazy
+from rest_framework.renderers import JSONRenderer
+
+from core.renderers import ORJSONRenderer
+
+
+class ORJSONRendererTests(SimpleTestCase):
+    """Test the orjson-backed renderer."""
+
+    def test_matches_drf_json_renderer(self):
+        """Output decodes to the same data DRF's renderer produces."""
+        data = {
+            "amount": Decimal("12.50"),
+            "created_at": datetime(2024, 1, 2, 3, 4, 5, tzinfo=timezone.utc),
+            "label": gettext_lazy("Deposit"),
+            "items": [{"id": 1, "name": "Mug"}],
+            1: "non-string key",
+        }
+
+        expected = JSONRenderer().render(data)
+        rendered = ORJSONRenderer().render(data)
+
+        self.assertEqual(json.loads(rendered), json.loads(expected))
+        self.assertIn(b'"2024-01-02T03:04:05Z"', rendered)
+
+    def test_render_none(self):
+        """An empty body renders as no bytes."""
+        self.assertEqual(ORJSONRenderer().render(None), b"")
+
+    def test_indent(self):
+        """A requested indent pretty-prints the output."""
+        rendered = ORJSONRenderer().render(
+            {"a": 1}, "application/json; indent=4"
+        )
+
+        self.assertEqual(rendered, b'{\n  "a": 1\n}')
@@ -1,10 +1,11 @@
 from rest_framework import serializers
+from core.serializers_base import CachedFieldsMixin
 from core.models import Order, OrderItem
-from product.serializers import ProductSerializer
+from product.serializers import ProductMiniSerializer
 
 
-class OrderItemSerializer(serializers.ModelSerializer):
-    product = ProductSerializer(read_only=True)
+class OrderItemSerializer(CachedFieldsMixin, serializers.ModelSerializer):
+    product = ProductMiniSerializer(read_only=True)
     product_id = serializers.IntegerField(write_only=True)
 
     class Meta:
@@ -19,7 +20,7 @@ class OrderItemSerializer(serializers.ModelSerializer):
         read_only_fields = ["price"]
 
 
-class OrderSerializer(serializers.ModelSerializer):
+class OrderSerializer(CachedFieldsMixin, serializers.ModelSerializer):
     items = OrderItemSerializer(many=True, read_only=True)
     total_amount = serializers.DecimalField(
         max_digits=10, decimal_places=2, read_only=True
@@ -41,3 +42,19 @@ class OrderSerializer(serializers.ModelSerializer):
             "updated_at",
         ]
         read_only_fields = ["user", "created_at", "updated_at"]
+
+
+class OrderSummarySerializer(CachedFieldsMixin, serializers.ModelSerializer):
+    """Flat order representation returned by the write actions"""
+
+    class Meta:
+        model = Order
+        fields = [
+            "id",
+            "status",
+            "payment_status",
+            "total_amount",
+            "shipping_address",
+            "created_at",
+        ]
+        read_only_fields = fields
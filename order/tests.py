@@ -1,3 +1,284 @@
+"""
+Tests for the order API.
+"""
+
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
 from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from core.models import (
+    Cart,
+    CartItem,
+    Category,
+    Color,
+    Order,
+    Product,
+    Wallet,
+)
+
+
+class OrderApiTests(TestCase):
+    """Test the order endpoints."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            username="buyer", password="pass12345"
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.cart = Cart.objects.create(user=self.user)
+        self.wallet = Wallet.objects.create(
+            user=self.user, balance=Decimal("100.00")
+        )
+
+        category = Category.objects.create(name="Mugs")
+        self.red = Color.objects.create(name="Red", code="#ff0000")
+        for i in range(3):
+            product = Product.objects.create(
+                name=f"Mug {i}",
+                description="A mug",
+                price=Decimal("10.00"),
+                image="products/mug.png",
+                category=category,
+            )
+            CartItem.objects.create(
+                cart=self.cart, product=product, quantity=2, color=self.red
+            )
+
+    def test_create_from_cart(self):
+        """Checking out copies the cart lines into a new order."""
+        res = self.client.post(
+            reverse("order-create-from-cart"),
+            {"shipping_address": "1 Main St"},
+        )
+
+        self.assertEqual(res.status_code, 201)
+        order = Order.objects.get(pk=res.data["id"])
+        self.assertEqual(order.total_amount, Decimal("60.00"))
+        self.assertEqual(order.items.count(), 3)
+        item = order.items.first()
+        self.assertEqual(item.price, Decimal("10.00"))
+        self.assertEqual(item.color, self.red)
+        self.cart.refresh_from_db()
+        self.assertEqual(self.cart.items_count, 0)
+        self.assertFalse(self.cart.items.exists())
+
+    def test_create_from_cart_query_count(self):
+        """Checkout cost does not grow with the number of cart lines."""
+        # Lock cart, insert order, copy lines, sum and save the total,
+        # delete lines, zero totals, plus two savepoints each opened and
+        # released
+        with self.assertNumQueries(11):
+            res = self.client.post(reverse("order-create-from-cart"))
+        self.assertEqual(res.status_code, 201)
+
+    def test_create_from_empty_cart(self):
+        """Checking out an empty cart is rejected."""
+        self.cart.clear()
+
+        res = self.client.post(reverse("order-create-from-cart"))
+
+        self.assertEqual(res.status_code, 400)
+        self.assertFalse(Order.objects.exists())
+
+    def test_create_from_cart_after_product_deleted(self):
+        """Only lines that are still in the cart are copied and charged."""
+        expensive = Product.objects.create(
+            name="Teapot",
+            description="A teapot",
+            price=Decimal("99.00"),
+            image="products/teapot.png",
+            category=Category.objects.get(),
+        )
+        CartItem.objects.create(cart=self.cart, product=expensive, quantity=1)
+        Product.objects.filter(name__startswith="Mug").exclude(
+            name="Mug 0"
+        ).delete()
+        expensive.delete()
+
+        res = self.client.post(reverse("order-create-from-cart"))
+
+        self.assertEqual(res.status_code, 201)
+        order = Order.objects.get(pk=res.data["id"])
+        self.assertEqual(order.total_amount, Decimal("20.00"))
+        self.assertEqual(order.items.count(), 1)
+
+    def test_create_from_cart_all_products_deleted(self):
+        """A cart whose products are all gone cannot be checked out."""
+        Product.objects.all().delete()
+
+        res = self.client.post(reverse("order-create-from-cart"))
+
+        self.assertEqual(res.status_code, 400)
+        self.assertEqual(res.data, {"error": "Cart is empty"})
+        self.assertFalse(Order.objects.exists())
+
+    def _create_order(self, total):
+        return Order.objects.create(
+            user=self.user, total_amount=total, shipping_address="1 Main St"
+        )
+
+    def test_pay_order(self):
+        """Paying withdraws the total from the wallet once."""
+        order = self._create_order(Decimal("60.00"))
+        url = reverse("order-pay", args=[order.pk])
+
+        res = self.client.post(url)
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.data["payment_status"], "paid")
+        self.wallet.refresh_from_db()
+        self.assertEqual(self.wallet.balance, Decimal("40.00"))
+        txn = self.wallet.transactions.get()
+        self.assertEqual(txn.transaction_type, "purchase")
+        self.assertEqual(txn.order, order)
+
+        res = self.client.post(url)
+        self.assertEqual(res.status_code, 400)
+        self.wallet.refresh_from_db()
+        self.assertEqual(self.wallet.balance, Decimal("40.00"))
+
+    def test_pay_order_insufficient_balance(self):
+        """A payment the wallet cannot cover changes nothing."""
+        order = self._create_order(Decimal("150.00"))
+
+        res = self.client.post(reverse("order-pay", args=[order.pk]))
+
+        self.assertEqual(res.status_code, 400)
+        order.refresh_from_db()
+        self.assertEqual(order.payment_status, "pending")
+        self.wallet.refresh_from_db()
+        self.assertEqual(self.wallet.balance, Decimal("100.00"))
+
+    def test_cancel_paid_order_refunds(self):
+        """Cancelling a paid order returns the total to the wallet."""
+        order = self._create_order(Decimal("60.00"))
+        self.client.post(reverse("order-pay", args=[order.pk]))
+
+        res = self.client.post(reverse("order-cancel", args=[order.pk]))
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.data["status"], "cancelled")
+        self.wallet.refresh_from_db()
+        self.assertEqual(self.wallet.balance, Decimal("100.00"))
+
+    def test_list_orders_query_count(self):
+        """Listing orders loads their items and products up front."""
+        for _ in range(3):
+            self.client.post(reverse("order-create-from-cart"))
+            for product in Product.objects.all():
+                self.cart.add_item(product.pk)
+
+        with self.assertNumQueries(2):
+            res = self.client.get(reverse("order-list"))
+
+        self.assertEqual(len(res.data["results"]), 3)
+        self.assertEqual(len(res.data["results"][0]["items"]), 3)
+
+    def test_list_orders_paginated(self):
+        """Orders are listed newest first, one cursor page at a time."""
+        orders = [self._create_order(Decimal("1.00")) for _ in range(3)]
+
+        res = self.client.get(reverse("order-list"), {"page_size": 2})
+
+        ids = [o["id"] for o in res.data["results"]]
+        self.assertEqual(ids, [orders[2].pk, orders[1].pk])
+        res = self.client.get(res.data["next"])
+        self.assertEqual(
+            [o["id"] for o in res.data["results"]], [orders[0].pk]
+        )
+        self.assertIsNone(res.data["next"])
+
+    def test_list_transactions(self):
+        """The transaction list shows the user's wallet history."""
+        self.wallet.deposit(Decimal("5.00"))
+
+        res = self.client.get(reverse("transaction-list"))
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(len(res.data), 1)
+        self.assertEqual(res.data[0]["transaction_type"], "deposit")
+
+    def test_order_items(self):
+        """The items action reuses the prefetched order items."""
+        res = self.client.post(reverse("order-create-from-cart"))
+        url = reverse("order-items", args=[res.data["id"]])
+
+        # ETag lookup, order, prefetched items
+        with self.assertNumQueries(3):
+            res = self.client.get(url)
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(len(res.data), 3)
+
+    def test_order_items_conditional_get(self):
+        """An unchanged order answers a matching If-None-Match with 304."""
+        res = self.client.post(reverse("order-create-from-cart"))
+        order_id = res.data["id"]
+        url = reverse("order-items", args=[order_id])
+        res = self.client.get(url)
+        etag = res["ETag"]
+        self.assertIn("private", res["Cache-Control"])
+
+        with self.assertNumQueries(1):
+            res = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, 304)
+
+        self.client.post(reverse("order-cancel", args=[order_id]))
+        res = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, 200)
+
+    def test_order_items_etag_tracks_products(self):
+        """Editing a product shown in the order invalidates its ETag."""
+        res = self.client.post(reverse("order-create-from-cart"))
+        url = reverse("order-items", args=[res.data["id"]])
+        etag = self.client.get(url)["ETag"]
+
+        Product.objects.filter(name="Mug 0").update(name="Renamed")
+        res = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, 200)
+        self.assertIn(
+            "Renamed", [item["product"]["name"] for item in res.data]
+        )
+
+    def test_wallet_detail_conditional_get(self):
+        """The wallet renders with its history and honours If-None-Match."""
+        self.wallet.deposit(Decimal("5.00"))
+        url = reverse("wallet-detail")
+
+        # ETag lookup, wallet, prefetched transactions
+        with self.assertNumQueries(3):
+            res = self.client.get(url)
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.data["balance"], "105.00")
+        self.assertEqual(len(res.data["transactions"]), 1)
+        etag = res["ETag"]
+
+        with self.assertNumQueries(1):
+            res = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, 304)
+
+    def test_wallet_deposit_and_withdraw(self):
+        """Wallet amounts are validated as decimals, including strings."""
+        res = self.client.post(
+            reverse("wallet-deposit"), {"amount": "12.50"}, format="json"
+        )
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.data["balance"], Decimal("112.50"))
+
+        res = self.client.post(
+            reverse("wallet-withdraw"), {"amount": "500"}, format="json"
+        )
+        self.assertEqual(res.status_code, 400)
 
-# Create your tests here.
+        for amount in ("0", "-5", "abc"):
+            res = self.client.post(
+                reverse("wallet-deposit"), {"amount": amount}, format="json"
+            )
+            self.assertEqual(res.status_code, 400)
+        self.wallet.refresh_from_db()
+        self.assertEqual(self.wallet.balance, Decimal("112.50"))
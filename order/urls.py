@@ -1,4 +1,4 @@
-from django.urls import path, include
+from django.urls import path
 from rest_framework.routers import DefaultRouter
 from .views import (
     OrderViewSet,
@@ -12,7 +12,7 @@ router = DefaultRouter()
 router.register(r"orders", OrderViewSet, basename="order")
 
 urlpatterns = [
-    path("", include(router.urls)),
+    *router.urls,
     # Wallet endpoints
     path("wallet/", WalletDetailView.as_view(), name="wallet-detail"),
     path(
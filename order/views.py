@@ -1,18 +1,48 @@
-from django.shortcuts import render
+from django.shortcuts import get_object_or_404, render
+from django.db import transaction
+from django.db.models import Prefetch
+from django.utils.decorators import method_decorator
 from rest_framework import viewsets, permissions, status, generics
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
-from core.models import Order, OrderItem
-from .serializers import OrderSerializer, OrderItemSerializer
+from core.conditional import etag_from_updated_at
+from core.pagination import CreatedAtCursorPagination
+from core.models import Cart, Order, OrderItem, Transaction, Wallet
+from wallet.serializers import (
+    AmountSerializer,
+    TransactionSerializer,
+    WalletSerializer,
+)
+from .serializers import (
+    OrderSerializer,
+    OrderItemSerializer,
+    OrderSummarySerializer,
+)
 from drf_spectacular.utils import (
     extend_schema,
     OpenApiParameter,
     OpenApiResponse,
 )
 
+# OpenAPI schema fragments shared by the order actions
+PK_PARAM = OpenApiParameter(name="pk", type=int, description="Order ID")
+AUTH_401 = OpenApiResponse(
+    description="Authentication credentials were not provided."
+)
+ORDER_NOT_FOUND_404 = OpenApiResponse(description="Order not found")
+
 # Create your views here.
 
 
+def _order_lookup(request, pk):
+    return Order.objects.filter(pk=pk, user=request.user)
+
+
+def _wallet_lookup(request):
+    return Wallet.objects.filter(user=request.user)
+
+
 class OrderViewSet(viewsets.ModelViewSet):
     """
     ViewSet for managing orders.
@@ -22,13 +52,30 @@ class OrderViewSet(viewsets.ModelViewSet):
 
     serializer_class = OrderSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = CreatedAtCursorPagination
 
     def get_queryset(self):
-        return Order.objects.filter(user=self.request.user)
+        return (
+            Order.objects.filter(user=self.request.user)
+            .order_by("-created_at")
+            .prefetch_related(
+                Prefetch(
+                    "items",
+                    queryset=OrderItem.objects.select_related("product"),
+                )
+            )
+        )
 
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
 
+    def _get_locked_order(self, pk):
+        """Fetch the user's order with a row lock, call inside atomic()"""
+        return get_object_or_404(
+            Order.objects.select_for_update().filter(user=self.request.user),
+            pk=pk,
+        )
+
     @extend_schema(
         tags=["orders"],
         summary="Create order from cart",
@@ -42,159 +89,144 @@ class OrderViewSet(viewsets.ModelViewSet):
             }
         },
         responses={
-            201: OrderSerializer,
+            201: OrderSummarySerializer,
             400: OpenApiResponse(description="Cart is empty or invalid data"),
-            401: OpenApiResponse(
-                description="Authentication credentials were not provided."
-            ),
+            401: AUTH_401,
         },
     )
     @action(detail=False, methods=["post"])
     def create_from_cart(self, request):
-        cart = request.user.cart
-        if not cart.items.exists():
-            return Response(
-                {"error": "Cart is empty"}, status=status.HTTP_400_BAD_REQUEST
+        with transaction.atomic():
+            # Lock the cart so a concurrent checkout cannot copy it twice
+            cart = (
+                Cart.objects.select_for_update()
+                .filter(user=request.user)
+                .first()
             )
+            if cart is None:
+                raise ValidationError({"error": "Cart is empty"})
 
-        try:
             order = Order.objects.create(
                 user=request.user,
-                total_amount=cart.get_total(),
+                total_amount=0,
                 shipping_address=request.data.get("shipping_address", ""),
             )
-
-            # Create order items from cart items
-            for cart_item in cart.items.all():
-                OrderItem.objects.create(
-                    order=order,
-                    product=cart_item.product,
-                    quantity=cart_item.quantity,
-                    price=cart_item.product.price,
-                )
+            # Emptiness and the total come from the lines actually copied,
+            # raising rolls the order back
+            if not order.copy_items_from_cart(cart):
+                raise ValidationError({"error": "Cart is empty"})
 
             # Clear the cart
             cart.clear()
 
-            serializer = OrderSerializer(order)
-            return Response(serializer.data, status=status.HTTP_201_CREATED)
-        except Exception as e:
-            return Response(
-                {"error": str(e)}, status=status.HTTP_400_BAD_REQUEST
-            )
+        serializer = OrderSummarySerializer(order)
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
 
     @extend_schema(
         tags=["orders"],
         summary="Cancel order",
         description="Cancels an existing order and refunds the payment if applicable.",
-        parameters=[
-            OpenApiParameter(name="pk", type=int, description="Order ID"),
-        ],
+        parameters=[PK_PARAM],
         responses={
-            200: OrderSerializer,
+            200: OrderSummarySerializer,
             400: OpenApiResponse(
                 description="Order cannot be cancelled in its current status"
             ),
-            401: OpenApiResponse(
-                description="Authentication credentials were not provided."
-            ),
-            404: OpenApiResponse(description="Order not found"),
+            401: AUTH_401,
+            404: ORDER_NOT_FOUND_404,
         },
     )
     @action(detail=True, methods=["post"])
     def cancel(self, request, pk=None):
-        order = self.get_object()
+        with transaction.atomic():
+            order = self._get_locked_order(pk)
 
-        if order.status not in ["pending", "processing"]:
-            return Response(
-                {"error": "Order cannot be cancelled in its current status"},
-                status=status.HTTP_400_BAD_REQUEST,
-            )
+            if order.status not in ["pending", "processing"]:
+                return Response(
+                    {
+                        "error": "Order cannot be cancelled in its current status"
+                    },
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
 
-        try:
             order.status = "cancelled"
             order.save()
 
             # Refund to wallet if payment was made
             if order.payment_status == "paid":
-                wallet = request.user.wallet
-                wallet.deposit(order.total_amount)
-
-            serializer = OrderSerializer(order)
-            return Response(serializer.data)
-        except Exception as e:
-            return Response(
-                {"error": str(e)}, status=status.HTTP_400_BAD_REQUEST
-            )
+                request.user.wallet.deposit(
+                    order.total_amount,
+                    transaction_type="refund",
+                    order=order,
+                )
+        serializer = OrderSummarySerializer(order)
+        return Response(serializer.data)
 
     @extend_schema(
         tags=["orders"],
         summary="Pay for order",
         description="Processes payment for an order using the user's wallet balance.",
-        parameters=[
-            OpenApiParameter(name="pk", type=int, description="Order ID"),
-        ],
+        parameters=[PK_PARAM],
         responses={
-            200: OrderSerializer,
+            200: OrderSummarySerializer,
             400: OpenApiResponse(
                 description="Order is already paid or insufficient wallet balance"
             ),
-            401: OpenApiResponse(
-                description="Authentication credentials were not provided."
-            ),
-            404: OpenApiResponse(description="Order not found"),
+            401: AUTH_401,
+            404: ORDER_NOT_FOUND_404,
         },
     )
     @action(detail=True, methods=["post"])
     def pay(self, request, pk=None):
-        order = self.get_object()
+        with transaction.atomic():
+            # Locking the order serializes concurrent payments
+            order = self._get_locked_order(pk)
 
-        if order.payment_status == "paid":
-            return Response(
-                {"error": "Order is already paid"},
-                status=status.HTTP_400_BAD_REQUEST,
-            )
-
-        try:
-            wallet = request.user.wallet
-            if wallet.balance < order.total_amount:
+            if order.payment_status == "paid":
                 return Response(
-                    {"error": "Insufficient wallet balance"},
+                    {"error": "Order is already paid"},
                     status=status.HTTP_400_BAD_REQUEST,
                 )
 
-            # Process payment
-            wallet.withdraw(order.total_amount)
+            # The withdrawal's UPDATE checks the balance itself
+            wallet = get_object_or_404(
+                Wallet.objects.only("id"), user=request.user
+            )
+            try:
+                wallet.withdraw(
+                    order.total_amount,
+                    transaction_type="purchase",
+                    order=order,
+                )
+            except Wallet.InsufficientFunds:
+                raise ValidationError({"error": "Insufficient wallet balance"})
             order.payment_status = "paid"
             order.save()
 
-            serializer = OrderSerializer(order)
-            return Response(serializer.data)
-        except Exception as e:
-            return Response(
-                {"error": str(e)}, status=status.HTTP_400_BAD_REQUEST
-            )
+        serializer = OrderSummarySerializer(order)
+        return Response(serializer.data)
 
     @extend_schema(
         tags=["orders"],
         summary="Get order items",
         description="Retrieves all items in a specific order.",
-        parameters=[
-            OpenApiParameter(name="pk", type=int, description="Order ID"),
-        ],
+        parameters=[PK_PARAM],
         responses={
             200: OrderItemSerializer(many=True),
-            401: OpenApiResponse(
-                description="Authentication credentials were not provided."
-            ),
-            404: OpenApiResponse(description="Order not found"),
+            401: AUTH_401,
+            404: ORDER_NOT_FOUND_404,
         },
     )
     @action(detail=True, methods=["get"])
+    @method_decorator(
+        etag_from_updated_at(
+            _order_lookup, related="items__product__updated_at"
+        )
+    )
     def items(self, request, pk=None):
         order = self.get_object()
-        items = OrderItem.objects.filter(order=order)
-        serializer = OrderItemSerializer(items, many=True)
+        # get_queryset() already prefetched the items with their products
+        serializer = OrderItemSerializer(order.items.all(), many=True)
         return Response(serializer.data)
 
 
@@ -203,10 +235,22 @@ class WalletDetailView(generics.RetrieveAPIView):
     View for retrieving wallet details.
     """
 
+    serializer_class = WalletSerializer
     permission_classes = [permissions.IsAuthenticated]
 
     def get_object(self):
-        return self.request.user.wallet
+        return get_object_or_404(
+            _wallet_lookup(self.request).prefetch_related(
+                Prefetch(
+                    "transactions",
+                    queryset=Transaction.objects.order_by("-created_at"),
+                )
+            )
+        )
+
+    @method_decorator(etag_from_updated_at(_wallet_lookup))
+    def get(self, request, *args, **kwargs):
+        return super().get(request, *args, **kwargs)
 
 
 class WalletDepositView(generics.CreateAPIView):
@@ -214,23 +258,17 @@ class WalletDepositView(generics.CreateAPIView):
     View for depositing funds into the wallet.
     """
 
+    serializer_class = AmountSerializer
     permission_classes = [permissions.IsAuthenticated]
 
     def post(self, request, *args, **kwargs):
-        amount = request.data.get("amount")
-        if not amount or amount <= 0:
-            return Response(
-                {"error": "Invalid amount"}, status=status.HTTP_400_BAD_REQUEST
-            )
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        amount = serializer.validated_data["amount"]
 
-        try:
-            wallet = request.user.wallet
-            wallet.deposit(amount)
-            return Response({"balance": wallet.balance})
-        except Exception as e:
-            return Response(
-                {"error": str(e)}, status=status.HTTP_400_BAD_REQUEST
-            )
+        wallet = get_object_or_404(Wallet, user=request.user)
+        wallet.deposit(amount)
+        return Response({"balance": wallet.balance})
 
 
 class WalletWithdrawView(generics.CreateAPIView):
@@ -238,28 +276,20 @@ class WalletWithdrawView(generics.CreateAPIView):
     View for withdrawing funds from the wallet.
     """
 
+    serializer_class = AmountSerializer
     permission_classes = [permissions.IsAuthenticated]
 
     def post(self, request, *args, **kwargs):
-        amount = request.data.get("amount")
-        if not amount or amount <= 0:
-            return Response(
-                {"error": "Invalid amount"}, status=status.HTTP_400_BAD_REQUEST
-            )
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        amount = serializer.validated_data["amount"]
 
+        wallet = get_object_or_404(Wallet, user=request.user)
         try:
-            wallet = request.user.wallet
-            if wallet.balance < amount:
-                return Response(
-                    {"error": "Insufficient balance"},
-                    status=status.HTTP_400_BAD_REQUEST,
-                )
             wallet.withdraw(amount)
-            return Response({"balance": wallet.balance})
-        except Exception as e:
-            return Response(
-                {"error": str(e)}, status=status.HTTP_400_BAD_REQUEST
-            )
+        except Wallet.InsufficientFunds:
+            raise ValidationError({"error": "Insufficient balance"})
+        return Response({"balance": wallet.balance})
 
 
 class TransactionListView(generics.ListAPIView):
@@ -267,7 +297,10 @@ class TransactionListView(generics.ListAPIView):
     View for listing wallet transactions.
     """
 
+    serializer_class = TransactionSerializer
     permission_classes = [permissions.IsAuthenticated]
 
     def get_queryset(self):
-        return self.request.user.wallet.transactions.all()
+        return Transaction.objects.filter(
+            wallet__user=self.request.user
+        ).order_by("-created_at")
@@ -1,8 +1,9 @@
 from rest_framework import serializers
+from core.serializers_base import CachedFieldsMixin
 from core.models import Payment
 
 
-class PaymentSerializer(serializers.ModelSerializer):
+class PaymentSerializer(CachedFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Payment
         fields = [
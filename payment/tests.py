@@ -1,3 +1,153 @@
+"""
+Tests for the payment API.
+"""
+
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from core.models import Order, Payment, Wallet
+
+
+class PaymentApiTests(TestCase):
+    """Test the payment endpoints."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            username="buyer", password="pass12345"
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        order = Order.objects.create(
+            user=self.user,
+            total_amount=Decimal("60.00"),
+            shipping_address="1 Main St",
+        )
+        self.payment = Payment.objects.create(
+            order=order,
+            amount=order.total_amount,
+            payment_method="credit_card",
+        )
+
+    def test_status_conditional_get(self):
+        """The status action honours If-None-Match until the payment
+        changes."""
+        url = reverse("payment-status", args=[self.payment.pk])
+        res = self.client.get(url)
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.data["status"], "pending")
+        etag = res["ETag"]
+
+        res = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, 304)
+
+        self.client.post(reverse("payment-cancel", args=[self.payment.pk]))
+        res = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.data["status"], "failed")
+
+    def test_retrieve_payment(self):
+        """Retrieving a payment renders its fields on every request."""
+        url = reverse("payment-detail", args=[self.payment.pk])
+
+        for _ in range(2):
+            res = self.client.get(url)
+            self.assertEqual(res.status_code, 200)
+            self.assertEqual(res.data["order"], self.payment.order_id)
+            self.assertEqual(res.data["amount"], "60.00")
+
+    def test_other_users_payment_not_found(self):
+        """Another user's payment is a 404, not a 304."""
+        other = get_user_model().objects.create_user(
+            username="other", password="pass12345"
+        )
+        self.client.force_authenticate(other)
+
+        res = self.client.get(
+            reverse("payment-detail", args=[self.payment.pk]),
+            HTTP_IF_NONE_MATCH="*",
+        )
+
+        self.assertEqual(res.status_code, 404)
+
+    def test_process_wallet_payment(self):
+        """A wallet payment debits the wallet and marks the order paid."""
+        wallet = Wallet.objects.create(
+            user=self.user, balance=Decimal("100.00")
+        )
+        order = Order.objects.create(
+            user=self.user,
+            total_amount=Decimal("30.00"),
+            shipping_address="1 Main St",
+        )
+
+        res = self.client.post(
+            reverse("payment-process-payment"), {"order_id": order.pk}
+        )
+
+        self.assertEqual(res.status_code, 201)
+        self.assertEqual(res.data["status"], "completed")
+        order.refresh_from_db()
+        self.assertEqual(order.payment_status, "paid")
+        wallet.refresh_from_db()
+        self.assertEqual(wallet.balance, Decimal("70.00"))
+        self.assertEqual(wallet.transactions.get().order, order)
+
+    def test_process_wallet_payment_insufficient_balance(self):
+        """A wallet payment the balance cannot cover leaves no trace."""
+        wallet = Wallet.objects.create(user=self.user, balance=Decimal("5.00"))
+        order = Order.objects.create(
+            user=self.user,
+            total_amount=Decimal("30.00"),
+            shipping_address="1 Main St",
+        )
+
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.post(
+                reverse("payment-process-payment"), {"order_id": order.pk}
+            )
+
+        self.assertEqual(res.status_code, 400)
+        self.assertFalse([q for q in queries if q["sql"].startswith("INSERT")])
+        self.assertFalse(Payment.objects.filter(order=order).exists())
+        wallet.refresh_from_db()
+        self.assertEqual(wallet.balance, Decimal("5.00"))
+        self.assertFalse(wallet.transactions.exists())
+
+    def test_process_payment_for_order_paid_through_orders(self):
+        """An order paid through the order endpoint is not charged again."""
+        wallet = Wallet.objects.create(
+            user=self.user, balance=Decimal("100.00")
+        )
+        order = Order.objects.create(
+            user=self.user,
+            total_amount=Decimal("30.00"),
+            shipping_address="1 Main St",
+        )
+        self.client.post(reverse("order-pay", args=[order.pk]))
+
+        res = self.client.post(
+            reverse("payment-process-payment"), {"order_id": order.pk}
+        )
+
+        self.assertEqual(res.status_code, 400)
+        self.assertEqual(res.data, {"error": "Order is already paid"})
+        wallet.refresh_from_db()
+        self.assertEqual(wallet.balance, Decimal("70.00"))
+
+    def test_process_payment_invalid_order_id(self):
+        """A missing or malformed order id is a 400, not a server error."""
+        url = reverse("payment-process-payment")
+
+        res = self.client.post(url, {})
+        self.assertEqual(res.status_code, 400)
+        self.assertEqual(res.data, {"error": "Order ID is required"})
 
-# Create your tests here.
+        res = self.client.post(url, {"order_id": "abc"})
+        self.assertEqual(res.status_code, 400)
+        self.assertEqual(res.data, {"error": "Invalid order ID"})
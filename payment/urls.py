@@ -1,10 +1,7 @@
-from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from .views import PaymentViewSet
 
 router = DefaultRouter()
 router.register(r"payments", PaymentViewSet, basename="payment")
 
-urlpatterns = [
-    path("", include(router.urls)),
-]
+urlpatterns = router.urls
@@ -1,9 +1,13 @@
-from django.shortcuts import render
+from django.shortcuts import get_object_or_404, render
 from rest_framework import viewsets, permissions, status
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
 from django.db import transaction
-from core.models import Payment, Order, Transaction
+from django.utils import timezone
+from django.utils.decorators import method_decorator
+from core.conditional import etag_from_updated_at
+from core.models import Payment, Order, Wallet
 from .serializers import PaymentSerializer
 from drf_spectacular.utils import (
     extend_schema,
@@ -11,9 +15,21 @@ from drf_spectacular.utils import (
     OpenApiResponse,
 )
 
+# OpenAPI schema fragments shared by the payment actions
+PK_PARAM = OpenApiParameter(name="pk", type=int, description="Payment ID")
+AUTH_401 = OpenApiResponse(
+    description="Authentication credentials were not provided."
+)
+INVALID_INPUT_400 = OpenApiResponse(description="Invalid input data")
+PAYMENT_NOT_FOUND_404 = OpenApiResponse(description="Payment not found")
+
 # Create your views here.
 
 
+def _payment_lookup(request, pk):
+    return Payment.objects.filter(pk=pk, order__user=request.user)
+
+
 class PaymentViewSet(viewsets.ModelViewSet):
     """
     ViewSet for managing payments.
@@ -25,7 +41,9 @@ class PaymentViewSet(viewsets.ModelViewSet):
     permission_classes = [permissions.IsAuthenticated]
 
     def get_queryset(self):
-        return Payment.objects.filter(order__user=self.request.user)
+        return Payment.objects.filter(order__user=self.request.user).order_by(
+            "-created_at"
+        )
 
     @extend_schema(
         tags=["payments"],
@@ -33,9 +51,7 @@ class PaymentViewSet(viewsets.ModelViewSet):
         description="Retrieves a list of all payments for the authenticated user.",
         responses={
             200: PaymentSerializer(many=True),
-            401: OpenApiResponse(
-                description="Authentication credentials were not provided."
-            ),
+            401: AUTH_401,
         },
     )
     def list(self, request, *args, **kwargs):
@@ -45,17 +61,14 @@ class PaymentViewSet(viewsets.ModelViewSet):
         tags=["payments"],
         summary="Retrieve payment",
         description="Retrieves details of a specific payment.",
-        parameters=[
-            OpenApiParameter(name="pk", type=int, description="Payment ID"),
-        ],
+        parameters=[PK_PARAM],
         responses={
             200: PaymentSerializer,
-            401: OpenApiResponse(
-                description="Authentication credentials were not provided."
-            ),
-            404: OpenApiResponse(description="Payment not found"),
+            401: AUTH_401,
+            404: PAYMENT_NOT_FOUND_404,
         },
     )
+    @method_decorator(etag_from_updated_at(_payment_lookup))
     def retrieve(self, request, *args, **kwargs):
         return super().retrieve(request, *args, **kwargs)
 
@@ -66,10 +79,8 @@ class PaymentViewSet(viewsets.ModelViewSet):
         request=PaymentSerializer,
         responses={
             201: PaymentSerializer,
-            400: OpenApiResponse(description="Invalid input data"),
-            401: OpenApiResponse(
-                description="Authentication credentials were not provided."
-            ),
+            400: INVALID_INPUT_400,
+            401: AUTH_401,
         },
     )
     def create(self, request, *args, **kwargs):
@@ -79,17 +90,13 @@ class PaymentViewSet(viewsets.ModelViewSet):
         tags=["payments"],
         summary="Update payment",
         description="Updates an existing payment record.",
-        parameters=[
-            OpenApiParameter(name="pk", type=int, description="Payment ID"),
-        ],
+        parameters=[PK_PARAM],
         request=PaymentSerializer,
         responses={
             200: PaymentSerializer,
-            400: OpenApiResponse(description="Invalid input data"),
-            401: OpenApiResponse(
-                description="Authentication credentials were not provided."
-            ),
-            404: OpenApiResponse(description="Payment not found"),
+            400: INVALID_INPUT_400,
+            401: AUTH_401,
+            404: PAYMENT_NOT_FOUND_404,
         },
     )
     def update(self, request, *args, **kwargs):
@@ -99,15 +106,11 @@ class PaymentViewSet(viewsets.ModelViewSet):
         tags=["payments"],
         summary="Delete payment",
         description="Deletes a payment record.",
-        parameters=[
-            OpenApiParameter(name="pk", type=int, description="Payment ID"),
-        ],
+        parameters=[PK_PARAM],
         responses={
             204: OpenApiResponse(description="Payment deleted successfully"),
-            401: OpenApiResponse(
-                description="Authentication credentials were not provided."
-            ),
-            404: OpenApiResponse(description="Payment not found"),
+            401: AUTH_401,
+            404: PAYMENT_NOT_FOUND_404,
         },
     )
     def destroy(self, request, *args, **kwargs):
@@ -136,9 +139,7 @@ class PaymentViewSet(viewsets.ModelViewSet):
             400: OpenApiResponse(
                 description="Invalid input data or insufficient balance"
             ),
-            401: OpenApiResponse(
-                description="Authentication credentials were not provided."
-            ),
+            401: AUTH_401,
             404: OpenApiResponse(description="Order not found"),
             501: OpenApiResponse(description="Payment method not implemented"),
         },
@@ -147,114 +148,126 @@ class PaymentViewSet(viewsets.ModelViewSet):
     def process_payment(self, request):
         order_id = request.data.get("order_id")
         payment_method = request.data.get("payment_method", "wallet")
-
-        try:
-            order = Order.objects.get(id=order_id, user=request.user)
-        except Order.DoesNotExist:
+        if order_id in (None, ""):
             return Response(
-                {"error": "Order not found"}, status=status.HTTP_404_NOT_FOUND
+                {"error": "Order ID is required"},
+                status=status.HTTP_400_BAD_REQUEST,
             )
-
-        if order.payment_status == "paid":
+        try:
+            order_id = int(order_id)
+        except (TypeError, ValueError):
             return Response(
-                {"error": "Order is already paid"},
+                {"error": "Invalid order ID"},
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        try:
-            with transaction.atomic():
-                if payment_method == "wallet":
-                    # Process wallet payment
-                    wallet = request.user.wallet
-                    if wallet.balance < order.total_amount:
-                        return Response(
-                            {"error": "Insufficient wallet balance"},
-                            status=status.HTTP_400_BAD_REQUEST,
-                        )
-
-                    # Create payment record
-                    payment = Payment.objects.create(
-                        order=order,
-                        amount=order.total_amount,
-                        payment_method="wallet",
-                        status="completed",
-                    )
-
-                    # Process wallet transaction
-                    wallet.withdraw(order.total_amount)
-
-                    # Create transaction record
-                    Transaction.objects.create(
-                        wallet=wallet,
-                        amount=order.total_amount,
+        with transaction.atomic():
+            # Lock the order so a concurrent pay or process_payment waits
+            # here and the checks below see what it wrote
+            try:
+                order = Order.objects.select_for_update().get(
+                    id=order_id, user=request.user
+                )
+            except Order.DoesNotExist:
+                return Response(
+                    {"error": "Order not found"},
+                    status=status.HTTP_404_NOT_FOUND,
+                )
+
+            if order.payment_status == "paid":
+                return Response(
+                    {"error": "Order is already paid"},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+            if Payment.objects.filter(order=order).exists():
+                return Response(
+                    {"error": "A payment already exists for this order"},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+
+            if payment_method == "wallet":
+                # Process wallet payment. The withdrawal's UPDATE checks the
+                # balance itself, so only the wallet id is needed here
+                wallet = get_object_or_404(
+                    Wallet.objects.only("id"), user=request.user
+                )
+
+                # Withdraw first so a declined payment writes nothing
+                try:
+                    wallet.withdraw(
+                        order.total_amount,
                         transaction_type="purchase",
                         order=order,
                     )
-
-                    # Update order status
-                    order.payment_status = "paid"
-                    order.save()
-
-                    serializer = PaymentSerializer(payment)
-                    return Response(
-                        serializer.data, status=status.HTTP_201_CREATED
-                    )
-
-                elif payment_method == "credit_card":
-                    # Here you would integrate with a credit card payment gateway
-                    # For now, we'll just create a pending payment
-                    payment = Payment.objects.create(
-                        order=order,
-                        amount=order.total_amount,
-                        payment_method="credit_card",
-                        status="pending",
-                    )
-                    return Response(
-                        {"error": "Credit card payment not implemented"},
-                        status=status.HTTP_501_NOT_IMPLEMENTED,
+                except Wallet.InsufficientFunds:
+                    raise ValidationError(
+                        {"error": "Insufficient wallet balance"}
                     )
 
-                elif payment_method == "bank_transfer":
-                    # Here you would integrate with a bank transfer system
-                    # For now, we'll just create a pending payment
-                    payment = Payment.objects.create(
-                        order=order,
-                        amount=order.total_amount,
-                        payment_method="bank_transfer",
-                        status="pending",
-                    )
-                    return Response(
-                        {"error": "Bank transfer payment not implemented"},
-                        status=status.HTTP_501_NOT_IMPLEMENTED,
-                    )
-
-                else:
-                    return Response(
-                        {"error": "Unsupported payment method"},
-                        status=status.HTTP_400_BAD_REQUEST,
-                    )
-
-        except Exception as e:
-            return Response(
-                {"error": str(e)}, status=status.HTTP_400_BAD_REQUEST
-            )
+                # Create payment record
+                payment = Payment.objects.create(
+                    order=order,
+                    amount=order.total_amount,
+                    payment_method="wallet",
+                    status="completed",
+                )
+
+                # Update order status without reloading or resaving it
+                Order.objects.filter(pk=order.pk).update(
+                    payment_status="paid", updated_at=timezone.now()
+                )
+
+                serializer = PaymentSerializer(payment)
+                return Response(
+                    serializer.data, status=status.HTTP_201_CREATED
+                )
+
+            elif payment_method == "credit_card":
+                # Here you would integrate with a credit card payment gateway
+                # For now, we'll just create a pending payment
+                payment = Payment.objects.create(
+                    order=order,
+                    amount=order.total_amount,
+                    payment_method="credit_card",
+                    status="pending",
+                )
+                return Response(
+                    {"error": "Credit card payment not implemented"},
+                    status=status.HTTP_501_NOT_IMPLEMENTED,
+                )
+
+            elif payment_method == "bank_transfer":
+                # Here you would integrate with a bank transfer system
+                # For now, we'll just create a pending payment
+                payment = Payment.objects.create(
+                    order=order,
+                    amount=order.total_amount,
+                    payment_method="bank_transfer",
+                    status="pending",
+                )
+                return Response(
+                    {"error": "Bank transfer payment not implemented"},
+                    status=status.HTTP_501_NOT_IMPLEMENTED,
+                )
+
+            else:
+                return Response(
+                    {"error": "Unsupported payment method"},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
 
     @extend_schema(
         tags=["payments"],
         summary="Refund payment",
         description="Processes a refund for a completed payment.",
-        parameters=[
-            OpenApiParameter(name="pk", type=int, description="Payment ID"),
-        ],
+        parameters=[PK_PARAM],
         responses={
             200: PaymentSerializer,
             400: OpenApiResponse(
                 description="Payment cannot be refunded in its current status"
             ),
-            401: OpenApiResponse(
-                description="Authentication credentials were not provided."
-            ),
-            404: OpenApiResponse(description="Payment not found"),
+            401: AUTH_401,
+            404: PAYMENT_NOT_FOUND_404,
             501: OpenApiResponse(description="Refund method not implemented"),
         },
     )
@@ -268,74 +281,60 @@ class PaymentViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        try:
-            with transaction.atomic():
-                if payment.payment_method == "wallet":
-                    # Process wallet refund
-                    wallet = request.user.wallet
-                    wallet.deposit(payment.amount)
-
-                    # Create refund transaction
-                    Transaction.objects.create(
-                        wallet=wallet,
-                        amount=payment.amount,
-                        transaction_type="refund",
-                        order=payment.order,
-                    )
-
-                    # Update payment status
-                    payment.status = "refunded"
-                    payment.save()
-
-                    # Update order status
-                    order = payment.order
-                    order.payment_status = "refunded"
-                    order.save()
-
-                    serializer = PaymentSerializer(payment)
-                    return Response(serializer.data)
-
-                elif payment.payment_method in [
-                    "credit_card",
-                    "bank_transfer",
-                ]:
-                    # Here you would integrate with the respective payment gateway
-                    # For now, we'll just update the status
-                    payment.status = "refunded"
-                    payment.save()
-
-                    order = payment.order
-                    order.payment_status = "refunded"
-                    order.save()
-
-                    return Response(
-                        {
-                            "error": f"{payment.payment_method} refund not implemented"
-                        },
-                        status=status.HTTP_501_NOT_IMPLEMENTED,
-                    )
-
-        except Exception as e:
-            return Response(
-                {"error": str(e)}, status=status.HTTP_400_BAD_REQUEST
-            )
+        with transaction.atomic():
+            if payment.payment_method == "wallet":
+                # Process wallet refund
+                wallet = request.user.wallet
+                wallet.deposit(
+                    payment.amount,
+                    transaction_type="refund",
+                    order=payment.order,
+                )
+
+                # Update payment status
+                payment.status = "refunded"
+                payment.save()
+
+                # Update order status
+                order = payment.order
+                order.payment_status = "refunded"
+                order.save()
+
+                serializer = PaymentSerializer(payment)
+                return Response(serializer.data)
+
+            elif payment.payment_method in [
+                "credit_card",
+                "bank_transfer",
+            ]:
+                # Here you would integrate with the respective payment gateway
+                # For now, we'll just update the status
+                payment.status = "refunded"
+                payment.save()
+
+                order = payment.order
+                order.payment_status = "refunded"
+                order.save()
+
+                return Response(
+                    {
+                        "error": f"{payment.payment_method} refund not implemented"
+                    },
+                    status=status.HTTP_501_NOT_IMPLEMENTED,
+                )
 
     @extend_schema(
         tags=["payments"],
         summary="Cancel payment",
         description="Cancels a pending payment.",
-        parameters=[
-            OpenApiParameter(name="pk", type=int, description="Payment ID"),
-        ],
+        parameters=[PK_PARAM],
         responses={
             200: PaymentSerializer,
             400: OpenApiResponse(
                 description="Payment cannot be cancelled in its current status"
             ),
-            401: OpenApiResponse(
-                description="Authentication credentials were not provided."
-            ),
-            404: OpenApiResponse(description="Payment not found"),
+            401: AUTH_401,
+            404: PAYMENT_NOT_FOUND_404,
         },
     )
     @action(detail=True, methods=["post"])
@@ -348,29 +347,21 @@ class PaymentViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        try:
-            payment.status = "failed"
-            payment.save()
-
-            order = payment.order
-            order.payment_status = "failed"
-            order.save()
+        payment.status = "failed"
+        payment.save()
 
-            serializer = PaymentSerializer(payment)
-            return Response(serializer.data)
+        order = payment.order
+        order.payment_status = "failed"
+        order.save()
 
-        except Exception as e:
-            return Response(
-                {"error": str(e)}, status=status.HTTP_400_BAD_REQUEST
-            )
+        serializer = PaymentSerializer(payment)
+        return Response(serializer.data)
 
     @extend_schema(
         tags=["payments"],
         summary="Get payment status",
         description="Retrieves the current status and details of a payment.",
-        parameters=[
-            OpenApiParameter(name="pk", type=int, description="Payment ID"),
-        ],
+        parameters=[PK_PARAM],
         responses={
             200: {
                 "type": "object",
@@ -382,13 +373,12 @@ class PaymentViewSet(viewsets.ModelViewSet):
                     "updated_at": {"type": "string", "format": "date-time"},
                 },
             },
-            401: OpenApiResponse(
-                description="Authentication credentials were not provided."
-            ),
-            404: OpenApiResponse(description="Payment not found"),
+            401: AUTH_401,
+            404: PAYMENT_NOT_FOUND_404,
         },
     )
     @action(detail=True, methods=["get"])
+    @method_decorator(etag_from_updated_at(_payment_lookup))
     def status(self, request, pk=None):
         payment = self.get_object()
         return Response(
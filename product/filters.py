@@ -0,0 +1,32 @@
+"""
+Filters for the product endpoints.
+"""
+
+from django_filters import rest_framework as filters
+
+from core.models import Product
+
+
+class NumberInFilter(filters.BaseInFilter, filters.NumberFilter):
+    """Comma-separated ids, e.g. `?category__in=1,2`"""
+
+
+class ProductFilter(filters.FilterSet):
+    """
+    Filter products by category and color ids.
+
+    Ids are validated as plain numbers rather than model choices, so a
+    filter no longer costs a lookup query per submitted id before the list
+    query runs. Unknown ids simply match nothing.
+    """
+
+    category = filters.NumberFilter(field_name="category")
+    category__in = NumberInFilter(field_name="category", lookup_expr="in")
+    colors = filters.NumberFilter(field_name="colors")
+    colors__in = NumberInFilter(
+        field_name="colors", lookup_expr="in", distinct=True
+    )
+
+    class Meta:
+        model = Product
+        fields = ["category", "colors"]
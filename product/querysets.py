@@ -0,0 +1,54 @@
+"""
+Reusable queryset building blocks for product endpoints.
+"""
+
+from django.db.models import (
+    BooleanField,
+    Case,
+    DecimalField,
+    F,
+    Prefetch,
+    Q,
+    Value,
+    When,
+)
+from django.db.models.functions import Now
+
+from core.models import Color
+
+# Shared by every queryset that renders ProductSerializer.colors
+COLORS_PREFETCH = Prefetch(
+    "colors", queryset=Color.objects.only("id", "name", "code")
+)
+
+
+def with_discount_info(queryset):
+    """
+    Annotate products with `is_discount_active` and `price_after_discount`
+    so Product.has_active_discount and Product.discounted_price are read
+    from the query instead of being computed per instance. The date range
+    is checked against the database clock, so the SQL does not change from
+    one request to the next.
+    """
+    now = Now()
+    active = Q(
+        discount__is_active=True,
+        discount__start_date__lte=now,
+        discount__end_date__gte=now,
+    )
+    return queryset.annotate(
+        is_discount_active=Case(
+            When(active, then=Value(True)),
+            default=Value(False),
+            output_field=BooleanField(),
+        ),
+        price_after_discount=Case(
+            When(
+                active,
+                then=F("price")
+                - F("price") * F("discount__discount_percent") / 100,
+            ),
+            default=F("price"),
+            output_field=DecimalField(max_digits=10, decimal_places=2),
+        ),
+    )
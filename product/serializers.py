@@ -57,6 +57,14 @@ class ProductSerializer(serializers.ModelSerializer):
         read_only_fields = ["created_at", "updated_at"]
 
 
+class ProductMiniSerializer(serializers.ModelSerializer):
+    """Compact product representation for cart and order lines"""
+
+    class Meta:
+        model = Product
+        fields = ["id", "name", "price", "image"]
+
+
 class ProductCreateUpdateSerializer(serializers.ModelSerializer):
     class Meta:
         model = Product
@@ -1,3 +1,194 @@
+"""
+Tests for the product API.
+"""
+
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from core.models import Category, Color, Discount, Product
+from product.querysets import with_discount_info
+
+
+class ProductApiTests(TestCase):
+    """Test the product endpoints."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user(
+            username="shopper", password="pass12345"
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.category = Category.objects.create(name="Mugs")
+        now = timezone.now()
+        self.active = Discount.objects.create(
+            name="Spring",
+            discount_percent=Decimal("20.00"),
+            start_date=now - timedelta(days=1),
+            end_date=now + timedelta(days=1),
+        )
+        self.expired = Discount.objects.create(
+            name="Winter",
+            discount_percent=Decimal("50.00"),
+            start_date=now - timedelta(days=10),
+            end_date=now - timedelta(days=1),
+        )
+
+    def _create_product(self, name, discount=None):
+        return Product.objects.create(
+            name=name,
+            description="A mug",
+            price=Decimal("10.00"),
+            image="products/mug.png",
+            category=self.category,
+            discount=discount,
+        )
+
+    def test_discounted_price_from_query(self):
+        """Discount fields are computed in the query, honouring dates."""
+        on_sale = self._create_product("On sale", self.active)
+        expired = self._create_product("Expired", self.expired)
+        plain = self._create_product("Plain")
+
+        res = self.client.get(reverse("product-list"))
+
+        products = {p["id"]: p for p in res.data["results"]}
+        self.assertEqual(products[on_sale.pk]["discounted_price"], "8.00")
+        self.assertTrue(products[on_sale.pk]["has_active_discount"])
+        self.assertEqual(products[expired.pk]["discounted_price"], "10.00")
+        self.assertFalse(products[expired.pk]["has_active_discount"])
+        self.assertEqual(products[plain.pk]["discounted_price"], "10.00")
+        self.assertFalse(products[plain.pk]["has_active_discount"])
+
+    def test_discount_flags_from_annotation(self):
+        """Annotated products answer discount questions without loading
+        their Discount."""
+        self._create_product("On sale", self.active)
+        self._create_product("Expired", self.expired)
+
+        products = list(with_discount_info(Product.objects.order_by("id")))
+
+        with self.assertNumQueries(0):
+            flags = [p.has_active_discount for p in products]
+            prices = [p.discounted_price for p in products]
+        self.assertEqual(flags, [True, False])
+        self.assertEqual(prices, [Decimal("8.00"), Decimal("10.00")])
+
+    def test_list_products_query_count(self):
+        """Listing products joins category and discount and prefetches
+        colors, however many products there are."""
+        red = Color.objects.create(name="Red", code="#ff0000")
+        for i in range(3):
+            self._create_product(f"Mug {i}", self.active).colors.add(red)
+
+        # Count, products with category and discount, then their colors
+        with self.assertNumQueries(3):
+            res = self.client.get(reverse("product-list"))
+
+        self.assertEqual(res.data["count"], 3)
+        self.assertEqual(len(res.data["results"]), 3)
+        self.assertEqual(res.data["results"][0]["category"]["name"], "Mugs")
+        self.assertEqual(
+            res.data["results"][0]["colors"][0]["code"], "#ff0000"
+        )
+
+    def test_filter_by_category_and_colors(self):
+        """Id filters are applied without a validation query per id."""
+        plates = Category.objects.create(name="Plates")
+        red = Color.objects.create(name="Red", code="#ff0000")
+        blue = Color.objects.create(name="Blue", code="#0000ff")
+        mug = self._create_product("Mug")
+        mug.colors.add(red, blue)
+        plate = self._create_product("Plate")
+        plate.category = plates
+        plate.save()
+
+        with self.assertNumQueries(3):
+            res = self.client.get(
+                reverse("product-list"),
+                {"category__in": f"{self.category.pk},{plates.pk}"},
+            )
+        self.assertEqual(len(res.data["results"]), 2)
+
+        res = self.client.get(
+            reverse("product-list"), {"colors__in": f"{red.pk},{blue.pk}"}
+        )
+        self.assertEqual([p["id"] for p in res.data["results"]], [mug.pk])
+
+        res = self.client.get(reverse("product-list"), {"category": plates.pk})
+        self.assertEqual([p["id"] for p in res.data["results"]], [plate.pk])
+
+    def test_discounted_products(self):
+        """Only products with a currently valid discount are listed."""
+        on_sale = self._create_product("On sale", self.active)
+        self._create_product("Expired", self.expired)
+        self._create_product("Plain")
+
+        # Count, products filtered on the annotation, then their colors
+        with self.assertNumQueries(3):
+            res = self.client.get(reverse("product-discounted"))
+
+        self.assertEqual([p["id"] for p in res.data["results"]], [on_sale.pk])
+
+    def test_category_list_cached(self):
+        """The category list is served from the cache until a category
+        changes."""
+        url = reverse("category-list")
+        self.client.get(url)
+
+        with self.assertNumQueries(0):
+            res = self.client.get(url)
+        self.assertEqual([c["name"] for c in res.data], ["Mugs"])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Category.objects.create(name="Plates")
+        res = self.client.get(url)
+        self.assertEqual(len(res.data), 2)
+
+    def test_color_list_search(self):
+        """Searching colors bypasses the cache and returns plain rows."""
+        Color.objects.create(name="Red", code="#ff0000")
+        Color.objects.create(name="Blue", code="#0000ff")
+        self.client.get(reverse("color-list"))
+
+        res = self.client.get(reverse("color-list"), {"search": "Blu"})
+
+        self.assertEqual(len(res.data), 1)
+        self.assertEqual(set(res.data[0]), {"id", "name", "code"})
+        self.assertEqual(res.data[0]["code"], "#0000ff")
+
+    def test_list_products_paginated(self):
+        """The product list is paged newest first, a detail is not
+        filtered."""
+        products = [self._create_product(f"Mug {i}") for i in range(3)]
+
+        res = self.client.get(reverse("product-list"), {"limit": 2})
+
+        self.assertEqual(res.data["count"], 3)
+        ids = [p["id"] for p in res.data["results"]]
+        self.assertEqual(ids, [products[2].pk, products[1].pk])
+        res = self.client.get(
+            reverse("product-detail", args=[products[0].pk]),
+            {"category": self.category.pk + 1},
+        )
+        self.assertEqual(res.status_code, 200)
+
+    def test_search_and_ordering_still_applied(self):
+        """Search and ordering parameters still reach their backends."""
+        self._create_product("Blue cup")
+        self._create_product("Alpha cup")
+        self._create_product("Plate")
+
+        res = self.client.get(
+            reverse("product-list"), {"search": "cup", "ordering": "name"}
+        )
 
-# Create your tests here.
+        names = [p["name"] for p in res.data["results"]]
+        self.assertEqual(names, ["Alpha cup", "Blue cup"])
@@ -1,4 +1,3 @@
-from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from .views import (
     ProductViewSet,
@@ -13,6 +12,4 @@ router.register(r"categories", CategoryViewSet)
 router.register(r"colors", ColorViewSet)
 router.register(r"discounts", DiscountViewSet, basename="discount")
 
-urlpatterns = [
-    path("", include(router.urls)),
-]
+urlpatterns = router.urls
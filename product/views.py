@@ -1,9 +1,15 @@
 from django.shortcuts import render
+from django.core.cache import cache
 from rest_framework import viewsets, filters, permissions, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
+from rest_framework.settings import api_settings
 from django_filters.rest_framework import DjangoFilterBackend
+from core.cache import versioned
 from core.models import Product, Category, Color, Discount
+from core.pagination import BoundedLimitOffsetPagination
+from .filters import ProductFilter
+from .querysets import COLORS_PREFETCH, with_discount_info
 from .serializers import (
     ProductSerializer,
     ProductCreateUpdateSerializer,
@@ -17,9 +23,37 @@ from drf_spectacular.utils import (
     OpenApiResponse,
 )
 
+LIST_CACHE_TIMEOUT = 300
+
 # Create your views here.
 
 
+class CachedListMixin:
+    """
+    List a model whose serializer only has plain column fields.
+
+    Rows are read with values() on the serializer's Meta.fields instead of
+    going through the serializer. The unfiltered list is also cached under
+    the model's `list_cache_key`, which the model invalidates whenever an
+    instance is saved or deleted, so only queryset-level writes can leave it stale
+    until the timeout.
+    """
+
+    def list(self, request, *args, **kwargs):
+        if request.query_params:
+            return Response(self._list_rows())
+        key = versioned(self.queryset.model.list_cache_key)
+        data = cache.get(key)
+        if data is None:
+            data = self._list_rows()
+            cache.set(key, data, LIST_CACHE_TIMEOUT)
+        return Response(data)
+
+    def _list_rows(self):
+        fields = self.get_serializer_class().Meta.fields
+        return list(self.filter_queryset(self.get_queryset()).values(*fields))
+
+
 class DiscountViewSet(viewsets.ModelViewSet):
     """
     ViewSet for managing discounts.
@@ -66,16 +100,43 @@ class ProductViewSet(viewsets.ModelViewSet):
     Supports filtering, searching, and ordering.
     """
 
-    queryset = Product.objects.all()
+    queryset = (
+        Product.objects.select_related(
+            "category", "discount"
+        ).prefetch_related(COLORS_PREFETCH)
+        # A stable order for the offset pages
+        .order_by("-id")
+    )
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
+    pagination_class = BoundedLimitOffsetPagination
     filter_backends = [
         DjangoFilterBackend,
         filters.SearchFilter,
         filters.OrderingFilter,
     ]
-    filterset_fields = ["category", "colors"]
+    filterset_class = ProductFilter
     search_fields = ["name", "description"]
     ordering_fields = ["price", "created_at", "name"]
+    # Query parameters any of the filter backends above reads
+    filter_params = frozenset(
+        [
+            *ProductFilter.base_filters,
+            api_settings.SEARCH_PARAM,
+            api_settings.ORDERING_PARAM,
+        ]
+    )
+
+    def get_queryset(self):
+        return with_discount_info(super().get_queryset())
+
+    def filter_queryset(self, queryset):
+        # Detail routes look a product up by pk, and a list without any
+        # filter parameter has nothing for the backends to do
+        if self.detail or self.filter_params.isdisjoint(
+            self.request.query_params
+        ):
+            return queryset
+        return super().filter_queryset(queryset)
 
     def get_serializer_class(self):
         if self.action in ["create", "update", "partial_update"]:
@@ -172,13 +233,16 @@ class ProductViewSet(viewsets.ModelViewSet):
     )
     @action(detail=False, methods=["get"])
     def discounted(self, request):
-        products = Product.objects.filter(discount__isnull=False)
-        products = [p for p in products if p.has_active_discount]
+        products = self.get_queryset().filter(is_discount_active=True)
+        page = self.paginate_queryset(products)
+        if page is not None:
+            serializer = self.get_serializer(page, many=True)
+            return self.get_paginated_response(serializer.data)
         serializer = self.get_serializer(products, many=True)
         return Response(serializer.data)
 
 
-class CategoryViewSet(viewsets.ModelViewSet):
+class CategoryViewSet(CachedListMixin, viewsets.ModelViewSet):
     """
     ViewSet for managing product categories.
     Supports searching by name and description.
@@ -191,7 +255,7 @@ class CategoryViewSet(viewsets.ModelViewSet):
     search_fields = ["name", "description"]
 
 
-class ColorViewSet(viewsets.ModelViewSet):
+class ColorViewSet(CachedListMixin, viewsets.ModelViewSet):
     """
     ViewSet for managing product colors.
     Supports searching by name.
@@ -4,3 +4,10 @@ from django.apps import AppConfig
 class UserConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'user'
+
+    def ready(self):
+        from django.core.checks import register
+
+        from .checks import check_blacklist_cache
+
+        register(check_blacklist_cache)
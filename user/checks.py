@@ -0,0 +1,32 @@
+"""
+System checks for the user app.
+"""
+
+from django.conf import settings
+from django.core.checks import Warning
+
+# Backends whose entries are private to one process
+PROCESS_LOCAL_CACHES = {
+    "django.core.cache.backends.locmem.LocMemCache",
+    "django.core.cache.backends.dummy.DummyCache",
+}
+
+
+def check_blacklist_cache(app_configs, **kwargs):
+    """
+    CachedBlacklistRefreshToken keeps rotated refresh tokens in the default
+    cache. A process-local cache lets every other worker accept them again.
+    """
+    backend = settings.CACHES.get("default", {}).get("BACKEND")
+    if backend in PROCESS_LOCAL_CACHES:
+        return [
+            Warning(
+                "The default cache is local to each process, so refresh "
+                "tokens blacklisted by one worker are still accepted by "
+                "the others.",
+                hint="Set REDIS_URL, or point CACHES['default'] at another "
+                "shared backend.",
+                id="user.W001",
+            )
+        ]
+    return []
@@ -1,7 +1,10 @@
 
 from drf_spectacular.utils import OpenApiResponse, extend_schema
 from rest_framework import status
-from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+from rest_framework_simplejwt.serializers import (
+    TokenObtainPairSerializer,
+    TokenRefreshSerializer,
+)
 from rest_framework_simplejwt.views import (
     TokenObtainPairView,
     TokenRefreshView,
@@ -9,6 +12,7 @@ from rest_framework_simplejwt.views import (
 )
 
 from .serializers import UserSerializer
+from .tokens import CachedBlacklistRefreshToken
 
 
 class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
@@ -59,11 +63,21 @@ class CustomTokenObtainPairView(TokenObtainPairView):
         return super().post(request, *args, **kwargs)
 
 
+class CustomTokenRefreshSerializer(TokenRefreshSerializer):
+    """
+    Refresh serializer that blacklists rotated refresh tokens in the cache
+    """
+
+    token_class = CachedBlacklistRefreshToken
+
+
 class CustomTokenRefreshView(TokenRefreshView):
     """
     Takes a refresh token and returns a new access token
     """
 
+    serializer_class = CustomTokenRefreshSerializer
+
     @extend_schema(
         operation_id="token_refresh",
         responses={
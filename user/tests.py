@@ -1,3 +1,136 @@
-from django.test import TestCase
+"""
+Tests for the user API.
+"""
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from user.checks import check_blacklist_cache
+
+
+class UserApiTests(TestCase):
+    """Test the user endpoints."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user(
+            username="member", password="pass12345", first_name="Sam"
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_me_cached_until_profile_changes(self):
+        """The current user's profile is cached until it is updated."""
+        res = self.client.post(
+            reverse("token_obtain_pair"),
+            {"username": "member", "password": "pass12345"},
+        )
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {res.data['access']}")
+        url = reverse("user-me")
+        client.get(url)
+
+        # JWTAuthentication still loads the user, the profile is cached
+        with self.assertNumQueries(1):
+            res = client.get(url)
+        self.assertEqual(res.data["first_name"], "Sam")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            client.post(
+                reverse("user-update-profile", args=[self.user.pk]),
+                {"first_name": "Alex"},
+            )
+        res = client.get(url)
+        self.assertEqual(res.data["first_name"], "Alex")
+
+    def test_retrieve_reads_rendered_columns_only(self):
+        """Reading a user leaves the password hash in the database."""
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.get(reverse("user-detail", args=[self.user.pk]))
+
+        self.assertEqual(res.data["username"], "member")
+        self.assertEqual(len(queries), 1)
+        self.assertNotIn("password", queries[0]["sql"])
+
+    def test_change_password(self):
+        """A new password must pass the validators before the old one is
+        checked."""
+        url = reverse("user-change-password", args=[self.user.pk])
+
+        res = self.client.post(
+            url, {"old_password": "wrong", "new_password": "123"}
+        )
+        self.assertEqual(res.status_code, 400)
+        self.assertEqual(list(res.data), ["error"])
+        self.assertIn("too short", res.data["error"])
+
+        res = self.client.post(
+            url, {"old_password": "wrong", "new_password": "n3w-Secret!"}
+        )
+        self.assertEqual(res.data, {"error": "Invalid old password"})
+
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.post(
+                url,
+                {"old_password": "pass12345", "new_password": "n3w-Secret!"},
+            )
+        self.assertEqual(res.status_code, 200)
+        (update,) = [
+            q["sql"] for q in queries if q["sql"].startswith("UPDATE")
+        ]
+        self.assertNotIn("email", update)
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.check_password("n3w-Secret!"))
+
+    def test_rotated_refresh_token_blacklisted(self):
+        """A refresh token stops working once it has been rotated."""
+        client = APIClient()
+        res = client.post(
+            reverse("token_obtain_pair"),
+            {"username": "member", "password": "pass12345"},
+        )
+        refresh = res.data["refresh"]
+
+        res = client.post(reverse("token_refresh"), {"refresh": refresh})
+        self.assertEqual(res.status_code, 200)
+        self.assertIn("access", res.data)
+
+        res = client.post(reverse("token_refresh"), {"refresh": refresh})
+        self.assertEqual(res.status_code, 401)
+
+    def test_login_returns_user(self):
+        """Obtaining a token pair also returns the user's profile."""
+        res = APIClient().post(
+            reverse("token_obtain_pair"),
+            {"username": "member", "password": "pass12345"},
+        )
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.data["user"]["id"], self.user.pk)
+        self.assertEqual(res.data["user"]["first_name"], "Sam")
+        self.assertIsNone(res.data["user"]["avatar"])
+
+    def test_blacklist_cache_check(self):
+        """A process-local default cache is flagged for the blacklist."""
+        local = {
+            "default": {
+                "BACKEND": "django.core.cache.backends.locmem.LocMemCache"
+            }
+        }
+        shared = {
+            "default": {
+                "BACKEND": "django.core.cache.backends.redis.RedisCache",
+                "LOCATION": "redis://127.0.0.1:6379/1",
+            }
+        }
+
+        with override_settings(CACHES=local):
+            errors = check_blacklist_cache(None)
+        self.assertEqual([e.id for e in errors], ["user.W001"])
+        with override_settings(CACHES=shared):
+            self.assertEqual(check_blacklist_cache(None), [])
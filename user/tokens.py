@@ -0,0 +1,42 @@
+"""
+JWT token classes.
+"""
+
+from django.core.cache import cache
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework_simplejwt.utils import datetime_from_epoch
+
+
+class CachedBlacklistRefreshToken(RefreshToken):
+    """
+    Refresh token whose blacklist lives in the cache instead of the
+    token_blacklist app's tables. The default cache must be shared by all
+    workers (see user.checks), or a token rotated in one worker is still
+    accepted by the others.
+
+    A blacklisted jti is kept until the token would have expired anyway,
+    so checking a token is a single cache read and entries clean themselves
+    up.
+    """
+
+    @staticmethod
+    def blacklist_cache_key(jti):
+        return f"jwt:blacklist:{jti}"
+
+    def verify(self, *args, **kwargs):
+        super().verify(*args, **kwargs)
+        self.check_blacklist()
+
+    def check_blacklist(self):
+        jti = self.payload[api_settings.JTI_CLAIM]
+        if cache.get(self.blacklist_cache_key(jti)):
+            raise TokenError(_("Token is blacklisted"))
+
+    def blacklist(self):
+        jti = self.payload[api_settings.JTI_CLAIM]
+        expires_at = datetime_from_epoch(self.payload["exp"])
+        ttl = (expires_at - self.current_time).total_seconds()
+        cache.set(self.blacklist_cache_key(jti), True, max(int(ttl), 1))
@@ -1,4 +1,4 @@
-from django.urls import path, include
+from django.urls import path
 from rest_framework.routers import DefaultRouter
 from .views import UserViewSet
 from .jwt_views import (
@@ -13,7 +13,7 @@ router.register(r"users", UserViewSet, basename="user")
 
 
 urlpatterns = [
-    path("", include(router.urls)),
+    *router.urls,
     # JWT Token endpoints
     path(
         "token/", CustomTokenObtainPairView.as_view(), name="token_obtain_pair"
@@ -1,8 +1,12 @@
 from django.shortcuts import render
+from django.core.cache import cache
+from core.cache import versioned
 from rest_framework import viewsets, permissions, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from django.contrib.auth import get_user_model
+from django.contrib.auth.password_validation import validate_password
+from django.core.exceptions import ValidationError
 from .serializers import UserSerializer, UserRegistrationSerializer
 from .permissions import IsOwnerOrReadOnly
 from drf_spectacular.utils import (
@@ -14,6 +18,8 @@ from drf_spectacular.utils import (
 
 User = get_user_model()
 
+PROFILE_CACHE_TIMEOUT = 300
+
 
 @extend_schema_view(
     list=extend_schema(
@@ -100,6 +106,13 @@ class UserViewSet(viewsets.ModelViewSet):
     serializer_class = UserSerializer
     permission_classes = [permissions.IsAuthenticated, IsOwnerOrReadOnly]
 
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action in ("list", "retrieve"):
+            # Only the columns UserSerializer renders
+            return queryset.only(*UserSerializer.Meta.fields)
+        return queryset
+
     def get_serializer_class(self):
         if self.action == "create":
             return UserRegistrationSerializer
@@ -118,8 +131,14 @@ class UserViewSet(viewsets.ModelViewSet):
     )
     @action(detail=False, methods=["get"])
     def me(self, request):
-        serializer = self.get_serializer(request.user)
-        return Response(serializer.data)
+        # JWTAuthentication has already loaded the user, this only saves
+        # serializing it. Invalidated by CustomUser.save on profile changes
+        key = versioned(User.profile_cache_key(request.user.pk))
+        data = cache.get(key)
+        if data is None:
+            data = dict(self.get_serializer(request.user).data)
+            cache.set(key, data, PROFILE_CACHE_TIMEOUT)
+        return Response(data)
 
     @extend_schema(
         tags=["users"],
@@ -183,6 +202,15 @@ class UserViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
+        # Cheap checks first: check_password runs the full password hash
+        try:
+            validate_password(new_password, user)
+        except ValidationError as e:
+            return Response(
+                {"error": " ".join(e.messages)},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
         if not user.check_password(old_password):
             return Response(
                 {"error": "Invalid old password"},
@@ -190,7 +218,7 @@ class UserViewSet(viewsets.ModelViewSet):
             )
 
         user.set_password(new_password)
-        user.save()
+        user.save(update_fields=["password"])
         return Response({"message": "Password changed successfully"})
 
     @extend_schema(
@@ -1,3 +1,5 @@
+from decimal import Decimal
+
 from rest_framework import serializers
 from core.models import Wallet, Transaction
 
@@ -32,3 +34,11 @@ class WalletSerializer(serializers.ModelSerializer):
             "updated_at",
         ]
         read_only_fields = ["user", "created_at", "updated_at"]
+
+
+class AmountSerializer(serializers.Serializer):
+    """Validates the amount of a deposit or withdrawal"""
+
+    amount = serializers.DecimalField(
+        max_digits=10, decimal_places=2, min_value=Decimal("0.01")
+    )
@@ -1,3 +1,139 @@
+"""
+Tests for the wallet API.
+"""
+
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from core.models import Wallet
+
+
+class WalletApiTests(TestCase):
+    """Test the wallet endpoints."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user(
+            username="saver", password="pass12345"
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.wallet = Wallet.objects.create(
+            user=self.user, balance=Decimal("100.00")
+        )
+
+    def test_retrieve_wallet_with_transactions(self):
+        """A wallet renders its transactions from one prefetch query."""
+        for _ in range(3):
+            self.wallet.deposit(Decimal("5.00"))
+
+        # Wallet, then its transactions
+        with self.assertNumQueries(2):
+            res = self.client.get(
+                reverse("wallet-detail", args=[self.wallet.pk])
+            )
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.data["balance"], "115.00")
+        self.assertEqual(len(res.data["transactions"]), 3)
+
+    def test_transactions_paginated(self):
+        """The transaction history is cursor-paged, newest first."""
+        txns = [self.wallet.deposit(Decimal("1.00")) for _ in range(3)]
+        url = reverse("wallet-transactions", args=[self.wallet.pk])
+
+        # Wallet id, then one page of transactions
+        with self.assertNumQueries(2):
+            res = self.client.get(url, {"page_size": 2})
+
+        ids = [t["id"] for t in res.data["results"]]
+        self.assertEqual(ids, [txns[2].pk, txns[1].pk])
+        res = self.client.get(res.data["next"])
+        ids = [t["id"] for t in res.data["results"]]
+        self.assertEqual(ids, [txns[0].pk])
+
+    def test_balance_skips_transactions(self):
+        """Checking the balance reads one narrow wallet row."""
+        self.wallet.deposit(Decimal("5.00"))
+
+        with self.assertNumQueries(1):
+            res = self.client.get(
+                reverse("wallet-balance", args=[self.wallet.pk])
+            )
+
+        self.assertEqual(res.data["balance"], Decimal("105.00"))
+
+    def test_deposit_and_withdraw(self):
+        """Balance changes are one UPDATE plus the transaction INSERT."""
+        url = reverse("wallet-deposit", args=[self.wallet.pk])
+
+        # Wallet id, savepoint, UPDATE, INSERT, release
+        with self.assertNumQueries(5):
+            res = self.client.post(url, {"amount": "10.00"}, format="json")
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.data["transaction_type"], "deposit")
+
+        res = self.client.post(
+            reverse("wallet-withdraw", args=[self.wallet.pk]),
+            {"amount": "500"},
+            format="json",
+        )
+        self.assertEqual(res.status_code, 400)
+        self.wallet.refresh_from_db()
+        self.assertEqual(self.wallet.balance, Decimal("110.00"))
+        self.assertEqual(self.wallet.transactions.count(), 1)
+
+    def test_invalid_amounts_rejected(self):
+        """Amounts are parsed as decimals and must be positive."""
+        url = reverse("wallet-deposit", args=[self.wallet.pk])
+
+        for amount in ("0", "-5", "abc", "0.001", "123456789.00"):
+            res = self.client.post(url, {"amount": amount}, format="json")
+            self.assertEqual(res.status_code, 400)
+
+        res = self.client.post(url, {"amount": "0.10"}, format="json")
+        self.assertEqual(res.data["amount"], "0.10")
+        self.wallet.refresh_from_db()
+        self.assertEqual(self.wallet.balance, Decimal("100.10"))
+
+    def test_balance_cached_until_it_changes(self):
+        """Balance polls are served from the cache until money moves."""
+        url = reverse("wallet-balance", args=[self.wallet.pk])
+        self.client.get(url)
+
+        with self.assertNumQueries(0):
+            res = self.client.get(url)
+        self.assertEqual(res.data["balance"], Decimal("100.00"))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.wallet.withdraw(Decimal("30.00"))
+        res = self.client.get(url)
+        self.assertEqual(res.data["balance"], Decimal("70.00"))
+
+    def test_cached_balance_not_shared(self):
+        """Another user's cached balance is a 404, not a cache hit."""
+        url = reverse("wallet-balance", args=[self.wallet.pk])
+        self.client.get(url)
+        other = get_user_model().objects.create_user(
+            username="other", password="pass12345"
+        )
+        self.client.force_authenticate(other)
+
+        res = self.client.get(url)
+
+        self.assertEqual(res.status_code, 404)
+
+    def test_withdraw_insufficient_funds(self):
+        """Overdrawing raises Wallet.InsufficientFunds and records
+        nothing."""
+        with self.assertRaises(Wallet.InsufficientFunds):
+            self.wallet.withdraw(Decimal("100.01"))
 
-# Create your tests here.
+        self.wallet.refresh_from_db()
+        self.assertEqual(self.wallet.balance, Decimal("100.00"))
+        self.assertFalse(self.wallet.transactions.exists())
@@ -1,15 +1,26 @@
 from django.shortcuts import render
-from rest_framework import viewsets, permissions, status
+from django.core.cache import cache
+from django.db.models import Prefetch
+from rest_framework import viewsets, permissions
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
+from core.cache import versioned
 from core.models import Wallet, Transaction
-from .serializers import WalletSerializer, TransactionSerializer
+from core.pagination import CreatedAtCursorPagination
+from .serializers import (
+    AmountSerializer,
+    TransactionSerializer,
+    WalletSerializer,
+)
 from drf_spectacular.utils import (
     extend_schema,
     OpenApiParameter,
     OpenApiResponse,
 )
 
+BALANCE_CACHE_TIMEOUT = 60
+
 # Create your views here.
 
 
@@ -24,7 +35,19 @@ class WalletViewSet(viewsets.ModelViewSet):
     permission_classes = [permissions.IsAuthenticated]
 
     def get_queryset(self):
-        return Wallet.objects.filter(user=self.request.user)
+        queryset = Wallet.objects.filter(user=self.request.user)
+        if self.action in ("deposit", "withdraw", "transactions"):
+            # These only need the wallet's id: the balance is changed with
+            # a single UPDATE and the history is paged from the database
+            return queryset.only("id")
+        if self.action == "balance":
+            return queryset.only("id", "balance")
+        return queryset.prefetch_related(
+            Prefetch(
+                "transactions",
+                queryset=Transaction.objects.order_by("-created_at"),
+            )
+        )
 
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
@@ -122,15 +145,7 @@ class WalletViewSet(viewsets.ModelViewSet):
         parameters=[
             OpenApiParameter(name="pk", type=int, description="Wallet ID"),
         ],
-        request={
-            "application/json": {
-                "type": "object",
-                "properties": {
-                    "amount": {"type": "number", "minimum": 0.01},
-                },
-                "required": ["amount"],
-            }
-        },
+        request=AmountSerializer,
         responses={
             200: TransactionSerializer,
             400: OpenApiResponse(description="Invalid amount provided"),
@@ -142,23 +157,14 @@ class WalletViewSet(viewsets.ModelViewSet):
     )
     @action(detail=True, methods=["post"])
     def deposit(self, request, pk=None):
-        wallet = self.get_object()
-        amount = request.data.get("amount")
-
-        if not amount or float(amount) <= 0:
-            return Response(
-                {"error": "Valid amount is required"},
-                status=status.HTTP_400_BAD_REQUEST,
-            )
+        serializer = AmountSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        amount = serializer.validated_data["amount"]
 
-        try:
-            transaction = wallet.deposit(float(amount))
-            serializer = TransactionSerializer(transaction)
-            return Response(serializer.data)
-        except Exception as e:
-            return Response(
-                {"error": str(e)}, status=status.HTTP_400_BAD_REQUEST
-            )
+        wallet = self.get_object()
+        transaction = wallet.deposit(amount)
+        serializer = TransactionSerializer(transaction)
+        return Response(serializer.data)
 
     @extend_schema(
         tags=["wallet"],
@@ -167,15 +173,7 @@ class WalletViewSet(viewsets.ModelViewSet):
         parameters=[
             OpenApiParameter(name="pk", type=int, description="Wallet ID"),
         ],
-        request={
-            "application/json": {
-                "type": "object",
-                "properties": {
-                    "amount": {"type": "number", "minimum": 0.01},
-                },
-                "required": ["amount"],
-            }
-        },
+        request=AmountSerializer,
         responses={
             200: TransactionSerializer,
             400: OpenApiResponse(
@@ -189,23 +187,17 @@ class WalletViewSet(viewsets.ModelViewSet):
     )
     @action(detail=True, methods=["post"])
     def withdraw(self, request, pk=None):
-        wallet = self.get_object()
-        amount = request.data.get("amount")
-
-        if not amount or float(amount) <= 0:
-            return Response(
-                {"error": "Valid amount is required"},
-                status=status.HTTP_400_BAD_REQUEST,
-            )
+        serializer = AmountSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        amount = serializer.validated_data["amount"]
 
+        wallet = self.get_object()
         try:
-            transaction = wallet.withdraw(float(amount))
-            serializer = TransactionSerializer(transaction)
-            return Response(serializer.data)
-        except Exception as e:
-            return Response(
-                {"error": str(e)}, status=status.HTTP_400_BAD_REQUEST
-            )
+            transaction = wallet.withdraw(amount)
+        except Wallet.InsufficientFunds:
+            raise ValidationError({"error": "Insufficient funds"})
+        serializer = TransactionSerializer(transaction)
+        return Response(serializer.data)
 
     @extend_schema(
         tags=["wallet"],
@@ -222,14 +214,16 @@ class WalletViewSet(viewsets.ModelViewSet):
             404: OpenApiResponse(description="Wallet not found"),
         },
     )
-    @action(detail=True, methods=["get"])
+    @action(
+        detail=True,
+        methods=["get"],
+        pagination_class=CreatedAtCursorPagination,
+    )
     def transactions(self, request, pk=None):
         wallet = self.get_object()
-        transactions = Transaction.objects.filter(wallet=wallet).order_by(
-            "-created_at"
-        )
-        serializer = TransactionSerializer(transactions, many=True)
-        return Response(serializer.data)
+        page = self.paginate_queryset(wallet.transactions.all())
+        serializer = TransactionSerializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
 
     @extend_schema(
         tags=["wallet"],
@@ -254,10 +248,21 @@ class WalletViewSet(viewsets.ModelViewSet):
     )
     @action(detail=True, methods=["get"])
     def balance(self, request, pk=None):
-        wallet = self.get_object()
+        # Invalidated by the Wallet model whenever the balance changes
+        key = versioned(Wallet.balance_cache_key(pk))
+        cached = cache.get(key)
+        if cached is not None and cached["user_id"] == request.user.pk:
+            balance = cached["balance"]
+        else:
+            balance = self.get_object().balance
+            cache.set(
+                key,
+                {"user_id": request.user.pk, "balance": balance},
+                BALANCE_CACHE_TIMEOUT,
+            )
         return Response(
             {
-                "balance": wallet.balance,
+                "balance": balance,
                 "currency": "USD",  # You can make this configurable
             }
         )